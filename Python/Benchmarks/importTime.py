@@ -0,0 +1,56 @@
+"""
+Measures how long it takes to import the modules the program uses. Every module is imported in a fresh Python
+process, so the time includes everything the module imports itself.
+
+Run with: python -m Python.Benchmarks.importTime
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import os
+import subprocess
+import sys
+
+modules = ["numpy", "cv2", "wx", "imutils", "shapely.geometry", "scipy.spatial", "matplotlib.pyplot",
+           "Python.Pathfinding.rrt", "Python.Pathfinding.rrt_star", "Python.Movement.snakeMethods",
+           "Python.ImageProcessing.findTarget", "Python.ImageProcessing.findSnake", "Python.GUI",
+           "Python.controller"]
+
+timingCode = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def measureImport(module, repeats=3):
+    """
+    Imports a module in a new Python process a number of times
+
+    :param module: name of the module
+    :param repeats: how many times to import it
+    :return: the fastest import time in seconds, None if the import failed
+    """
+    # The program runs from the Python folder (the logger and the GUI find their files from there), with the root
+    # of the repository on the path
+    pythonFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.dirname(pythonFolder) + os.pathsep + env.get("PYTHONPATH", "")
+    times = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", timingCode.format(module=module)], cwd=pythonFolder,
+                                env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main():
+    print(f"{'module':40s} {'import time':>12s}")
+    for module in modules:
+        importTime = measureImport(module)
+        if importTime is None:
+            print(f"{module:40s} {'failed':>12s}")
+        else:
+            print(f"{module:40s} {importTime * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
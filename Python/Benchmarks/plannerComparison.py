@@ -0,0 +1,87 @@
+"""
+Compares the single-target planners on time and path length. The sampling planners are run with several seeds on the
+recorded mazes, the visibility graph is deterministic and only needs one run per start and goal.
+
+Run with: python -m Python.Benchmarks.plannerComparison
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import contextlib
+import io
+import statistics
+import time
+
+from Python.Pathfinding.rrt_star import RRTStar
+from Python.Pathfinding.rrt_connect import RRTConnect
+from Python.Pathfinding.visibilityGraph import VisibilityGraph
+from Python.Benchmarks.plannerSuite import loadMazes
+
+edgeDist = 30
+
+
+def createPlanner(name, maze, start, goal, seed):
+    """
+    Creates one of the planners with the same settings as the controller
+
+    :param name: "rrtStar", "rrtConnect" or "visibility"
+    :param maze: maze from loadMazes
+    :param start: start point
+    :param goal: goal point
+    :param seed: seed for the sampling planners
+    :return: the planner
+    """
+    if name == "rrtStar":
+        return RRTStar(start=start, goal=goal, lineList=maze["lines"], edge_dist=edgeDist,
+                       rand_area_x=maze["area_x"], rand_area_y=maze["area_y"], expand_dis=100.0,
+                       path_resolution=10.0, max_iter=2000, goal_sample_rate=20, connect_circle_dist=700, seed=seed)
+    elif name == "rrtConnect":
+        return RRTConnect(start=start, goal=goal, rand_area_x=maze["area_x"], rand_area_y=maze["area_y"],
+                          lineList=maze["lines"], edge_dist=edgeDist, expand_dis=100.0, max_iter=2000,
+                          goal_sample_rate=20, seed=seed)
+    return VisibilityGraph(start=start, goal=goal, rand_area_x=maze["area_x"], rand_area_y=maze["area_y"],
+                           lineList=maze["lines"], edge_dist=edgeDist)
+
+
+def runPlanner(name, maze, start, goal, runs):
+    """
+    Runs a planner several times from start to goal
+
+    :param name: name of the planner, see createPlanner
+    :param maze: maze from loadMazes
+    :param start: start point
+    :param goal: goal point
+    :param runs: number of runs
+    :return: list of planning times, list of path lengths of the runs that found a path
+    """
+    times = []
+    lengths = []
+    for seed in range(runs):
+        planner = createPlanner(name, maze, start, goal, seed)
+        # RRT* prints when it is done
+        with contextlib.redirect_stdout(io.StringIO()):
+            startTime = time.perf_counter()
+            path = planner.planning()
+            times.append(time.perf_counter() - startTime)
+        if path is not None:
+            lengths.append(planner.treeStats(path, 0)["path_length"])
+    return times, lengths
+
+
+def main(runs=10):
+    print(f"{'maze':12s} {'start -> goal':26s} {'planner':12s} {'found':>7s} {'mean time':>11s} "
+          f"{'mean length':>12s} {'best length':>12s}")
+    for maze in loadMazes():
+        start = maze["points"][0]
+        for goal in maze["points"][1:]:
+            for name in ("rrtStar", "rrtConnect", "visibility"):
+                times, lengths = runPlanner(name, maze, start, goal, 1 if name == "visibility" else runs)
+                meanLength = f"{statistics.mean(lengths):12.1f}" if lengths else f"{'-':>12s}"
+                bestLength = f"{min(lengths):12.1f}" if lengths else f"{'-':>12s}"
+                print(f"{maze['name']:12s} {str(start) + ' -> ' + str(goal):26s} {name:12s} "
+                      f"{len(lengths):3d}/{len(times):<3d} {statistics.mean(times) * 1000:8.1f} ms {meanLength} "
+                      f"{bestLength}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Reproducible benchmark of the planners. Loads the recorded mazes in the mazes folder, and runs RRT, RRT* and
+multiRRTStar on them a number of times with fixed seeds, so two runs of the suite plan the exact same trees and
+only the code under test changes the numbers.
+
+Reports wall time, iterations, nodes, collision checks and path length percentiles for every planner and maze.
+
+Run with: python -m Python.Benchmarks.plannerSuite [runs]
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from Python.Pathfinding.rrt import RRT
+from Python.Pathfinding.rrt_star import RRTStar, multiRRTStar
+
+mazeFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mazes")
+
+edgeDist = 30
+
+
+def loadMazes(folder=mazeFolder):
+    """
+    Loads every maze in a folder
+
+    :param folder: folder with the JSON files from recordMaze
+    :return: list of dicts with the maze data, the lines as an array in the same format as from HoughLinesP
+    """
+    mazes = []
+    for filename in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        with open(filename) as f:
+            maze = json.load(f)
+        maze["lines"] = np.asarray(maze["lines"], dtype=np.int32).reshape(-1, 1, 4)
+        mazes.append(maze)
+    return mazes
+
+
+def percentiles(values, q=(10, 50, 90)):
+    """
+    Calculates percentiles of a list
+
+    :param values: list of numbers
+    :param q: percentiles to calculate
+    :return: list of the percentiles, None for each if the list is empty
+    """
+    if not values:
+        return [None] * len(q)
+    return [float(v) for v in np.percentile(values, q)]
+
+
+def runSingle(plannerClass, maze, start, goal, seed):
+    """
+    Runs RRT or RRT* once from start to goal
+
+    :param plannerClass: RRT or RRTStar
+    :param maze: maze from loadMazes
+    :param start: start point
+    :param goal: goal point
+    :param seed: seed for the planner
+    :return: dict with the statistics from treeStats
+    """
+    if plannerClass is RRTStar:
+        planner = RRTStar(start=start, goal=goal, lineList=maze["lines"], edge_dist=edgeDist,
+                          rand_area_x=maze["area_x"], rand_area_y=maze["area_y"], expand_dis=100.0,
+                          path_resolution=10.0, max_iter=2000, goal_sample_rate=20, connect_circle_dist=700,
+                          rng=random.Random(seed))
+    else:
+        planner = RRT(start=start, goal=goal, rand_area_x=maze["area_x"], rand_area_y=maze["area_y"],
+                      lineList=maze["lines"], edge_dist=edgeDist, expand_dis=100.0, max_iter=2000,
+                      goal_sample_rate=20, rng=random.Random(seed))
+
+    startTime = time.perf_counter()
+    path = planner.planning()
+    return planner.treeStats(path, time.perf_counter() - startTime)
+
+
+def runMulti(maze, seed):
+    """
+    Runs multiRRTStar once from the first point of the maze through all the other points
+
+    :param maze: maze from loadMazes
+    :param seed: seed for the planners
+    :return: dict with the statistics summed over all the RRT* runs, and the length of the whole path
+    """
+    planner = multiRRTStar(rand_area_x=maze["area_x"], rand_area_y=maze["area_y"], lineList=maze["lines"],
+                           expand_dis=50.0, path_resolution=25.0, max_iter=2000, goal_sample_rate=10,
+                           edge_dist=edgeDist, connect_circle_dist=800, start_point=maze["points"][0],
+                           listOfDeadEnds=maze["points"][1:], workers=1, order="tsp", rng=random.Random(seed))
+
+    startTime = time.perf_counter()
+    paths = planner.run()
+    planningTime = time.perf_counter() - startTime
+
+    pathLength = None
+    if paths is not None:
+        pathLength = sum(planner.sumPaths(paths))
+    return {"iterations": sum(s["iterations"] for s in planner.runStats),
+            "nodes": sum(s["nodes"] for s in planner.runStats),
+            "collision_checks": sum(s["collision_checks"] for s in planner.runStats),
+            "path_length": pathLength,
+            "planning_time": planningTime}
+
+
+def summarize(name, mazeName, results):
+    """
+    Prints one line of the report
+
+    :param name: name of the planner
+    :param mazeName: name of the maze
+    :param results: list of dicts from treeStats
+    :return: None
+    """
+    lengths = [r["path_length"] for r in results if r["path_length"] is not None]
+    p10, p50, p90 = percentiles(lengths)
+    lengthText = f"{p10:7.0f} {p50:7.0f} {p90:7.0f}" if lengths else f"{'-':>7s} {'-':>7s} {'-':>7s}"
+    print(f"{mazeName:12s} {name:8s} {len(lengths):3d}/{len(results):<3d} "
+          f"{np.mean([r['planning_time'] for r in results]) * 1000:9.1f} "
+          f"{np.mean([r['iterations'] for r in results]):8.0f} "
+          f"{np.mean([r['nodes'] for r in results]):7.0f} "
+          f"{np.mean([r['collision_checks'] for r in results]):9.0f} "
+          f"{lengthText}")
+
+
+def main(runs=10):
+    print(f"{'maze':12s} {'planner':8s} {'found':>7s} {'time[ms]':>9s} {'iters':>8s} {'nodes':>7s} "
+          f"{'checks':>9s} {'len p10':>7s} {'len p50':>7s} {'len p90':>7s}")
+    for maze in loadMazes():
+        start = maze["points"][0]
+        # The planners print while they run
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = {"RRT": [], "RRT*": [], "multi": []}
+            for seed in range(runs):
+                for goal in maze["points"][1:]:
+                    results["RRT"].append(runSingle(RRT, maze, start, goal, seed))
+                    results["RRT*"].append(runSingle(RRTStar, maze, start, goal, seed))
+                results["multi"].append(runMulti(maze, seed))
+
+        for name, planResults in results.items():
+            summarize(name, maze["name"], planResults)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,53 @@
+"""
+Records the maze lines from a picture to a JSON file the benchmarks can load. The lines are found the same way as
+mazeRecognizer.findMaze does it on the camera picture.
+
+Run with: python -m Python.Benchmarks.recordMaze <picture> <name> [x,y x,y ...]
+The points after the name are saved as the points of interest of the maze, the first one is the start. The area
+the planners sample in is set to the whole picture, and can be narrowed down in the file afterwards.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import json
+import os
+import sys
+
+import cv2
+from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
+
+mazeFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mazes")
+
+
+def recordMaze(picturePath, name, points=None):
+    """
+    Finds the lines in a picture and saves them to mazes/<name>.json
+
+    :param picturePath: path of the picture of the maze
+    :param name: name of the maze
+    :param points: list of [x, y], the first one is the start and the rest are goals
+    :return: path of the JSON file
+    """
+    picture = cv2.imread(picturePath)
+    if picture is None:
+        raise FileNotFoundError(picturePath)
+
+    lines = mazeRecognizer().findLines(picture)
+    data = {"name": name,
+            "source": os.path.basename(picturePath),
+            "width": picture.shape[1],
+            "height": picture.shape[0],
+            "lines": lines.reshape(-1, 4).tolist(),
+            "points": points or [],
+            "area_x": [0, picture.shape[1]],
+            "area_y": [0, picture.shape[0]]}
+
+    filename = os.path.join(mazeFolder, name + ".json")
+    with open(filename, "w") as f:
+        json.dump(data, f)
+    return filename
+
+
+if __name__ == "__main__":
+    points = [[int(v) for v in point.split(",")] for point in sys.argv[3:]]
+    print(recordMaze(sys.argv[1], sys.argv[2], points))
@@ -0,0 +1,90 @@
+"""
+Measures the time from a picture to the coordinates of the snake. Runs FindSnake on the pictures in the Pictures
+folder, and times the colour segmentation alone against segmenting with a separate HSV conversion for each colour,
+the way it was done before ColorSegmenter.
+
+Run with: python -m Python.Benchmarks.snakeDetection [repeats]
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from Python.ImageProcessing.findSnake import FindSnake
+
+pictureFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Pictures")
+
+
+def loadPictures(folder=pictureFolder):
+    """
+    Loads the pictures in a folder, scaled to the 1920x1080 the camera takes
+
+    :param folder: folder with jpg pictures
+    :return: list of (name, picture)
+    """
+    pictures = []
+    for filename in sorted(glob.glob(os.path.join(folder, "*.jpg"))):
+        picture = cv2.imread(filename)
+        if picture is not None:
+            pictures.append((os.path.basename(filename), cv2.resize(picture, (1920, 1080))))
+    return pictures
+
+
+def separateConversions(picture):
+    """
+    Segments the snake with one HSV conversion for each colour, for comparison
+
+    :param picture: picture in BGR
+    :return: green and red mask
+    """
+    blurred = cv2.GaussianBlur(picture, (7, 7), 0)
+    maskG = cv2.inRange(cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV), np.array([42, 0, 0], dtype=np.uint8),
+                        np.array([83, 255, 255], dtype=np.uint8))
+    maskR = cv2.inRange(cv2.cvtColor(blurred, cv2.COLOR_RGB2HSV), np.array([100, 170, 20], dtype=np.uint8),
+                        np.array([140, 255, 240], dtype=np.uint8))
+    return maskG, maskR
+
+
+def timeIt(function, pictures, repeats):
+    """
+    Times a function on every picture
+
+    :param function: function that takes a picture
+    :param pictures: list of (name, picture)
+    :param repeats: number of times to run the function on each picture
+    :return: list of times in milliseconds
+    """
+    times = []
+    for _, picture in pictures:
+        function(picture.copy())
+        for _ in range(repeats):
+            frame = picture.copy()
+            startTime = time.perf_counter()
+            function(frame)
+            times.append((time.perf_counter() - startTime) * 1000)
+    return times
+
+
+def main(repeats=10):
+    pictures = loadPictures()
+    findSnake = FindSnake()
+    tests = {"separate conversions": separateConversions,
+             "ColorSegmenter": findSnake.segmenter.segment,
+             "locateSnake": findSnake.locateSnake,
+             "locateSnakeAverage": lambda picture: findSnake.locateSnakeAverage(1, 1, picture=picture)}
+
+    print(f"{len(pictures)} pictures, {repeats} runs each")
+    print(f"{'':22s} {'mean[ms]':>9s} {'p50[ms]':>9s} {'p90[ms]':>9s}")
+    for name, function in tests.items():
+        times = timeIt(function, pictures, repeats)
+        p50, p90 = np.percentile(times, [50, 90])
+        print(f"{name:22s} {np.mean(times):9.1f} {p50:9.1f} {p90:9.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -4,22 +4,48 @@ Simple protocol to easily be able to use the same overhead camera in all differe
 author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 """
 
+import threading
+import time
+from collections import deque
+
 import cv2
 
 
 class Camera:
     """
     Controls a camera so multiple classes can access the same camera with minimal setup delay \n
+    A background thread reads the camera all the time and keeps the newest frames in a small ring buffer, so taking
+    a picture returns the latest frame right away instead of waiting for the camera. Every frame has a sequence
+    number, so several detectors can work on the same frame.
     """
 
     cam = None
+    frames = deque(maxlen=4)
+    frameReady = threading.Condition()
+    captureThread = None
+    capturing = False
+    sequence = 0
+    # Sequence number of the newest frame that has been handed out
+    lastTaken = -1
+
+    # Counters
+    framesCaptured = 0
+    droppedFrames = 0
+    failedReads = 0
+    captureTime = 0.0
+
+    def __init__(self):
+        # Sequence number of the last frame this instance handed out
+        self.lastSequence = -1
 
     @staticmethod
-    def initCam(camNr: int = 0):
+    def initCam(camNr: int = 0, threaded: bool = True, bufferSize: int = 4):
         """
         Initialise the camera class with a camera. \n
         must be called only once before getting an instance of the class \n
         :param camNr: Camera to use, 0 is usually the standard webCam on the PC
+        :param threaded: read the camera in a background thread, False to read it when a picture is taken
+        :param bufferSize: number of frames to keep in the ring buffer
         :return: None
         """
         Camera.cam = cv2.VideoCapture(camNr)
@@ -27,27 +53,139 @@ class Camera:
         Camera.cam.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
         Camera.cam.set(cv2.CAP_PROP_AUTOFOCUS, 0)
 
+        Camera.frames = deque(maxlen=bufferSize)
+        if threaded:
+            Camera.capturing = True
+            Camera.captureThread = threading.Thread(target=Camera.captureLoop, name="CameraCapture", daemon=True)
+            Camera.captureThread.start()
+
     @staticmethod
     def releaseCam():
         """
         Release the camera. Called on program quit
         :return:
         """
+        Camera.capturing = False
+        if Camera.captureThread is not None:
+            Camera.captureThread.join(timeout=1.0)
+            Camera.captureThread = None
         Camera.cam.release()
 
-    def takePictureRgb(self):
+    @staticmethod
+    def captureLoop():
+        """
+        Reads the camera until releaseCam is called, and puts every frame in the ring buffer with its sequence number
+        and the time it was read. A frame that is replaced before anyone took it counts as dropped.
+
+        :return: None
+        """
+        while Camera.capturing:
+            startTime = time.monotonic()
+            ok, frame = Camera.cam.read()
+            readTime = time.monotonic()
+            if not ok or frame is None:
+                Camera.failedReads += 1
+                time.sleep(0.01)
+                continue
+
+            with Camera.frameReady:
+                if Camera.frames and Camera.frames[-1][0] > Camera.lastTaken:
+                    Camera.droppedFrames += 1
+                Camera.sequence += 1
+                Camera.frames.append((Camera.sequence, readTime, frame))
+                Camera.framesCaptured += 1
+                Camera.captureTime += readTime - startTime
+                Camera.frameReady.notify_all()
+
+    @staticmethod
+    def readFrame():
+        """
+        Reads a frame straight from the camera, used when there is no capture thread
+
+        :return: (sequence number, time it was read, frame)
+        """
+        startTime = time.monotonic()
+        _, frame = Camera.cam.read()
+        readTime = time.monotonic()
+        with Camera.frameReady:
+            Camera.sequence += 1
+            Camera.framesCaptured += 1
+            Camera.captureTime += readTime - startTime
+            Camera.frames.append((Camera.sequence, readTime, frame))
+            return Camera.frames[-1]
+
+    def latestFrame(self, newFrame=False, timeout=1.0):
+        """
+        Gets the newest frame without copying it. The frame is shared, so it must not be drawn on.
+
+        :param newFrame: wait for a frame this instance has not handed out before
+        :param timeout: max seconds to wait for a frame
+        :return: (sequence number, time it was read, frame), frame is None if the camera gave no frame in time
+        """
+        if Camera.captureThread is None:
+            latest = Camera.readFrame()
+        else:
+            with Camera.frameReady:
+                Camera.frameReady.wait_for(lambda: Camera.frames and (not newFrame or
+                                                                      Camera.frames[-1][0] > self.lastSequence),
+                                           timeout=timeout)
+                if not Camera.frames:
+                    return None, None, None
+                latest = Camera.frames[-1]
+        with Camera.frameReady:
+            Camera.lastTaken = max(Camera.lastTaken, latest[0])
+        self.lastSequence = latest[0]
+        return latest
+
+    @staticmethod
+    def getFrame(sequence):
+        """
+        Gets a frame from the ring buffer by its sequence number, so several detectors can use the same frame
+
+        :param sequence: sequence number of the frame
+        :return: the frame, None if it is no longer in the buffer
+        """
+        with Camera.frameReady:
+            for frameSequence, _, frame in Camera.frames:
+                if frameSequence == sequence:
+                    return frame
+        return None
+
+    @staticmethod
+    def stats():
+        """
+        Gets the counters of the capture
+
+        :return: dict with frames_captured, dropped_frames (frames nobody took before a newer one came), failed_reads,
+            capture_latency (mean seconds a read took) and frame_age (seconds since the newest frame was read)
+        """
+        with Camera.frameReady:
+            latest = Camera.frames[-1] if Camera.frames else None
+            return {"frames_captured": Camera.framesCaptured,
+                    "dropped_frames": Camera.droppedFrames,
+                    "failed_reads": Camera.failedReads,
+                    "capture_latency": Camera.captureTime / Camera.framesCaptured if Camera.framesCaptured else None,
+                    "frame_age": time.monotonic() - latest[1] if latest is not None else None}
+
+    def takePictureRgb(self, newFrame=False):
         """
         Gets one picture from the camera and converts it to RGB
+        :param newFrame: wait for a frame this instance has not handed out before
         :return: Picture in RGB as np-array
         """
-        _, frame = Camera.cam.read()
+        _, _, frame = self.latestFrame(newFrame)
+        if frame is None:
+            return None
         frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         return frame
 
-    def takePicture(self):
+    def takePicture(self, newFrame=False):
         """
-        Gets one picture from the camera
+        Gets one picture from the camera. The picture is a copy, so it can be drawn on
+        :param newFrame: wait for a frame this instance has not handed out before
         :return: Picture as np-array
         """
-        _, frame = Camera.cam.read()
-        return frame
+        _, _, frame = self.latestFrame(newFrame)
+        if frame is None:
+            return None
+        return frame.copy()
@@ -6,6 +6,7 @@ author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 
 import cv2
 import numpy as np
+from Python.ImageProcessing.frameContext import FrameContext
 from Python.Movement.snake import Snake
 
 
@@ -17,17 +18,16 @@ class CheckPathForObst:
     def findObsInPath(self, picture):
         """
         Requests a picture from the front-facing camera, and checks if a given amount of the pixels are non-white.
-        :param picture: picture from the front-facing camera
+        :param picture: RGB picture from the front-facing camera, or its FrameContext
         :return:True if obstacle in path, False if not
         """
         try:
-            threshold = (picture.shape[0] * picture.shape[1] * 255) / 2
-            picture = cv2.cvtColor(picture, cv2.COLOR_RGB2BGR)
+            context = FrameContext.of(picture, colorOrder="RGB")
+            threshold = (context.shape[0] * context.shape[1] * 255) / 2
             notWhiteLower = (0, 40, 0)
             notWhiteUpper = (255, 255, 255)
 
-            blurred = cv2.GaussianBlur(picture, (11, 11), 0)
-            color = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+            color = context.hsv((11, 11))
             mask = cv2.inRange(color, notWhiteLower, notWhiteUpper)
             mask = cv2.dilate(mask, None, iterations=3)
             mask = cv2.erode(mask, None, iterations=3)
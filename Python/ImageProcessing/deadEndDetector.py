@@ -8,68 +8,203 @@ import glob
 import cv2
 import numpy as np
 from Python.ImageProcessing.camera import Camera
+from Python.ImageProcessing.frameContext import FrameContext
 import os
 
 
 class DeadEndDetector:
+    """
+    Finds dead ends by matching template pictures of dead ends against the picture of the maze. The matching is done
+    coarse to fine: every template is matched against a downscaled picture first, and only the areas that match
+    there are matched again in full resolution. Of the refined matches closer than minDistance, only the best is kept,
+    so each dead end is found once.
+    """
+
+    # The templates are read from disk once, key is (folder, pyramidLevels)
+    templates = {}
+
+    def __init__(self, threshold=0.71, pyramidLevels=3, coarseMargin=0.0, halfMargin=0.05, coarseDistance=2,
+                 searchRadius=2, minDistance=100, templateFolder=None):
+        """
+
+        :param threshold: lowest match (TM_CCOEFF_NORMED) that is a dead end
+        :param pyramidLevels: number of times the picture is halved for the coarse matching
+        :param coarseMargin: how much lower than threshold a coarse match can be and still be matched in full
+            resolution. The smallest picture is blurred, so its matches are higher than in full resolution
+        :param halfMargin: how much lower than threshold a match in half resolution can be and still be matched in
+            full resolution
+        :param coarseDistance: a coarse match is only matched in full resolution if it is the best within this many
+            pixels of the smallest picture. Keep it well below the size of the templates in the smallest picture, a
+            strong coarse match that is not a dead end must not hide a dead end next to it
+        :param searchRadius: extra pixels around a coarse match the template is matched in full resolution
+        :param minDistance: dead ends closer than this in both x and y are the same dead end
+        :param templateFolder: folder with the template pictures, None for Pictures/DeadEnds2 next to the working
+            directory when getDeadEnds is called
+        """
+        self.threshold = threshold
+        self.pyramidLevels = pyramidLevels
+        self.coarseMargin = coarseMargin
+        self.halfMargin = halfMargin
+        self.coarseDistance = coarseDistance
+        self.searchRadius = searchRadius
+        self.minDistance = minDistance
+        self.templateFolder = templateFolder
+
+    @staticmethod
+    def pyramid(picture, levels):
+        """
+        Makes the picture and the picture halved levels times
+
+        :param picture: picture
+        :param levels: number of times to halve the picture
+        :return: list of the pictures, from full size to smallest
+        """
+        pyramid = [picture]
+        for _ in range(levels):
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    def getTemplateFolder(self):
+        """
+        Gets the folder with the template pictures
+
+        :return: templateFolder, or Pictures/DeadEnds2 next to the working directory if it is None
+        """
+        if self.templateFolder is not None:
+            return self.templateFolder
+        return os.path.join(os.getcwd(), "..", "Pictures", "DeadEnds2")
+
+    @staticmethod
+    def loadTemplates(folder, levels):
+        """
+        Loads the template pictures in a folder and makes their pyramids. The templates are only read from disk the
+        first time. A folder without templates is not remembered, so it is read again on the next call
+
+        :param folder: folder with PNG templates
+        :param levels: number of times to halve the templates
+        :return: list of template pyramids
+        """
+        key = (os.path.abspath(folder), levels)
+        if key in DeadEndDetector.templates:
+            return DeadEndDetector.templates[key]
+
+        pyramids = []
+        for filename in sorted(glob.glob(os.path.join(folder, "*.PNG"))):
+            template = cv2.imread(filename, 0)
+            if template is not None:
+                pyramids.append(DeadEndDetector.pyramid(template, levels))
+        if pyramids:
+            DeadEndDetector.templates[key] = pyramids
+        return pyramids
+
+    @staticmethod
+    def localMaxima(response, threshold, distance):
+        """
+        Finds the points of a response map that are at least threshold and the highest within distance
+
+        :param response: result of matchTemplate
+        :param threshold: lowest value of a point
+        :param distance: points are compared to the points this close in both x and y
+        :return: row and column arrays of the points
+        """
+        size = 2 * distance + 1
+        highest = cv2.dilate(response, cv2.getStructuringElement(cv2.MORPH_RECT, (size, size)))
+        return np.nonzero((response >= threshold) & (response >= highest))
+
+    def coarseMatches(self, grayPyramid, templatePyramid):
+        """
+        Matches a template against the smallest picture of the pyramid
+
+        :param grayPyramid: pyramid of the grayscale picture
+        :param templatePyramid: pyramid of the template
+        :return: array of matches, column and row of the top left corner of the template in the smallest picture,
+            for the points that are good enough and the best match within coarseDistance
+        """
+        coarsePicture = grayPyramid[-1]
+        coarseTemplate = templatePyramid[-1]
+        if coarseTemplate.shape[0] > coarsePicture.shape[0] or coarseTemplate.shape[1] > coarsePicture.shape[1]:
+            return np.empty(0), np.empty(0, dtype=int), np.empty(0, dtype=int)
+        response = cv2.matchTemplate(coarsePicture, coarseTemplate, cv2.TM_CCOEFF_NORMED)
+        rows, cols = self.localMaxima(response, self.threshold - self.coarseMargin, self.coarseDistance)
+        return response[rows, cols], cols, rows
+
+    def refine(self, grayPyramid, templatePyramid, x, y):
+        """
+        Matches a template in full resolution around a coarse match. The coarse match only gives the position to
+        within the scale of the smallest picture, so the template is matched that far plus searchRadius around it.
+        The same area is matched in half resolution first, which is a quarter of the work, to throw out most of the
+        coarse matches that are not dead ends
+
+        :param grayPyramid: pyramid of the grayscale picture
+        :param templatePyramid: pyramid of the template
+        :param x: column of the top left corner of the template in the smallest picture
+        :param y: row of the top left corner of the template in the smallest picture
+        :return: (match, x, y) with the center of the template in the full picture, None if it is not a dead end
+        """
+        for level in ((1, 0) if len(grayPyramid) > 2 else (0,)):
+            picture = grayPyramid[level]
+            template = templatePyramid[level]
+            h, w = template.shape
+            scale = 2 ** (len(grayPyramid) - 1 - level)
+            margin = scale + self.searchRadius
+            x0 = min(max(x * scale - margin, 0), picture.shape[1] - w)
+            y0 = min(max(y * scale - margin, 0), picture.shape[0] - h)
+            x1 = min(x * scale + margin, picture.shape[1] - w)
+            y1 = min(y * scale + margin, picture.shape[0] - h)
+            response = cv2.matchTemplate(picture[y0:y1 + h, x0:x1 + w], template, cv2.TM_CCOEFF_NORMED)
+            _, best, _, (bestX, bestY) = cv2.minMaxLoc(response)
+            if best < self.threshold - (self.halfMargin if level else 0.0):
+                return None
+        return best, x0 + bestX + w / 2, y0 + bestY + h / 2
+
+    def suppress(self, matches):
+        """
+        Non-maximum suppression of the refined matches. Keeps the best match of the matches closer than minDistance
+        in both x and y
+
+        :param matches: list of (match, x, y)
+        :return: list of [x, y], best match first
+        """
+        if not matches:
+            return []
+        matches = np.array(matches, dtype=np.float64)
+        matches = matches[np.argsort(-matches[:, 0], kind="stable")]
+        keep = np.ones(len(matches), dtype=bool)
+        for i in range(len(matches)):
+            if keep[i]:
+                near = (np.abs(matches[i + 1:, 1] - matches[i, 1]) <= self.minDistance) & \
+                       (np.abs(matches[i + 1:, 2] - matches[i, 2]) <= self.minDistance)
+                keep[i + 1:] &= ~near
+        return matches[keep, 1:].tolist()
 
     def getDeadEnds(self, picture):
         """
         Takes in a picture of the maze
         checks the image for dead ends by using templating
-        :param picture: picture from overhead camera
-        :return: List of dead ends, picture with points representing dead ends
-        """
-        # img_rgb = cv2.imread(r"C:\Users\marcu\PycharmProjects\Luretriks-Slange\Pictures\DeadEnds\perf2.jpg")
-        img_rgb = picture
-        img_gray = cv2.cvtColor(img_rgb, cv2.COLOR_BGR2GRAY)
-        path = os.getcwd() + "\\" + "..\\Pictures\\DeadEnds2/*.PNG"
-        filenames = [img for img in glob.glob(path)]
-
-        templateList = []
-        for img in filenames:
-            n = cv2.imread(img, 0)
-            templateList.append(n)
-
-        threshold = 0.71
-
-        # loop over the scales of the image
-        loc = []
-        whList = []
-        for temp in templateList:
-
-            res = cv2.matchTemplate(img_gray, temp, cv2.TM_CCOEFF_NORMED)
-            res = np.where(res >= threshold)
-            if res:
-                loc.append(res)
-                w, h = temp.shape[::-1]
-                whList.append([w, h])
-
-        deadEnds = []
-        for point, whList in zip(loc, whList):
-            w, h = whList
-            for pt in zip(*point[::-1]):
-                deadEnds.append([pt[0] + w / 2, pt[1] + h / 2])
-
-        tempDeadEnds = []
-        for i in range(len(deadEnds)):
-            append = True
-            if i == len(deadEnds):
-                break
-            else:
-                for j in range(i + 1, len(deadEnds)):
-                    if (abs(deadEnds[i][0] - deadEnds[j][0]) <= 100 and abs(deadEnds[i][1] - deadEnds[j][1]) <= 100):
-                        append = False
-                        break
-            if append:
-                tempDeadEnds.append(deadEnds[i])
-        deadEnds = tempDeadEnds
+        :param picture: picture from overhead camera, or its FrameContext
+        :return: List of dead ends, best match first, picture with points representing dead ends
+        """
+        context = FrameContext.of(picture)
+        grayPyramid = context.cached(("grayPyramid", self.pyramidLevels),
+                                     lambda: self.pyramid(context.gray(), self.pyramidLevels))
+        templates = self.loadTemplates(self.getTemplateFolder(), self.pyramidLevels)
+        if not templates:
+            return [], context.canvas()
+
+        # Every coarse match good enough is refined, the matches close to each other are only removed after the
+        # refinement, since the best coarse match of an area is not always a dead end
+        matches = []
+        for templatePyramid in templates:
+            for _, x, y in zip(*self.coarseMatches(grayPyramid, templatePyramid)):
+                match = self.refine(grayPyramid, templatePyramid, x, y)
+                if match is not None:
+                    matches.append(match)
+        deadEnds = self.suppress(matches)
 
+        img_rgb = context.canvas()
         for point in deadEnds:
             cv2.circle(img_rgb, (int(point[0]), int(point[1])), 10, (255, 0, 255), 3)
 
-        #cv2.imshow("img", img_rgb)
-        #cv2.waitKey()
         return deadEnds, img_rgb
 
 
@@ -6,6 +6,7 @@ author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 
 import cv2
 import math
+import numpy as np
 
 
 def drawLines(image, lines, color=(0, 0, 0)):
@@ -43,6 +44,23 @@ def drawSeveralLines(image, pathList, color=(0, 0, 0)):
     return image
 
 
+def drawTree(image, edges, color=(0, 255, 0), thickness=1):
+    """
+    Draws all the edges of a planner tree on a picture in one call
+
+    :param image: Image to draw on
+    :param edges: Array of shape (n, 4) with x1, y1, x2, y2 for every edge, from RRT.getTreeEdges
+    :param color: Color the edges should be
+    :param thickness: Thickness of the edges
+    :return: Image with the tree drawn
+    """
+    if len(edges) == 0:
+        return image
+    lines = np.round(np.asarray(edges, dtype=np.float64)).astype(np.int32).reshape(-1, 2, 2)
+    cv2.polylines(image, list(lines), False, color, thickness)
+    return image
+
+
 def drawSection(image, center, startangle, endAngle, color, radius=50):
     """
     Draws a collision sector on a given picture
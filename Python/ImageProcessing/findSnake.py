@@ -5,48 +5,35 @@ author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 """
 
 import cv2
-import numpy as np
 from Python.ImageProcessing.camera import Camera
+from Python.ImageProcessing.colorSegmenter import ColorSegmenter
 import imutils
 
 
 class FindSnake:
 
+    # The red range was found on pictures converted from RGB to HSV. The picture is in BGR, so red and blue were
+    # swapped, and hue 100 to 140 there is hue 160 to 20 here
+    snakeColors = {"green": [((42, 0, 0), (83, 255, 255))],
+                   "red": [((160, 170, 20), (20, 255, 240))]}
+
     def __init__(self):
-        pass
+        self.segmenter = ColorSegmenter(FindSnake.snakeColors)
 
     def locateSnake(self, picture):
         """
         Locates center point of different parts of the snake through color thresholding
-        :param picture: Image to threshold on
+        :param picture: Image to threshold on, or its FrameContext
         :return: coordinates of parts, masked picture, None if no parts found
         """
 
-        greenLower = np.array([42, 0, 0], dtype=np.uint8)
-        greenUpper = np.array([83, 255, 255], dtype=np.uint8)
-
-        redLower = np.array([100, 170, 20], dtype=np.uint8)
-        redUpper = np.array([140, 255, 240], dtype=np.uint8)
-
-        blueLower = np.array([100, 150, 0], dtype=np.uint8)
-        blueUpper = np.array([140, 255, 255], dtype=np.uint8)
-
-        lowerWhite = np.array([0, 0, 180], dtype=np.uint8)
-        upperWhite = np.array([145, 60, 255], dtype=np.uint8)
-
-        blurred = cv2.GaussianBlur(picture, (7, 7), 0)
-        color1 = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
-        maskB = cv2.inRange(color1, blueLower, blueUpper)
-        maskG = cv2.inRange(color1, greenLower, greenUpper)
-        maskG = cv2.erode(maskG, None, iterations=3)
+        masks = self.segmenter.segment(picture)
+        maskG = cv2.erode(masks["green"], None, iterations=3)
         maskG = cv2.dilate(maskG, None, iterations=3)
 
-        color2 = cv2.cvtColor(blurred, cv2.COLOR_RGB2HSV)
-        maskR = cv2.inRange(color2, redLower, redUpper)
-        maskR = cv2.erode(maskR, None, iterations=1)
+        maskR = cv2.erode(masks["red"], None, iterations=1)
         maskR = cv2.dilate(maskR, None, iterations=6)
 
-        maskW = cv2.inRange(color1, lowerWhite, upperWhite)
         cnts = cv2.findContours(maskG, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         cnts = imutils.grab_contours(cnts)
 
@@ -88,49 +75,31 @@ class FindSnake:
         :param iterations: amount of pictures to use to create the mask
         :param average: how many values to take average of
         :param filterExtreme: flag if extreme values should be removed
-        :param picture: picture to use if no average is wanted
+        :param picture: picture or FrameContext to use if no average is wanted
         :return: coordinates of snake parts, masked picture, None if no coordinates are found
         """
         cam = Camera()
 
-        greenLower = np.array([42, 0, 0], dtype=np.uint8)
-        greenUpper = np.array([83, 255, 255], dtype=np.uint8)
-
-        redLower = np.array([100, 170, 20], dtype=np.uint8)
-        redUpper = np.array([140, 255, 240], dtype=np.uint8)
-
-        purpleLower = np.array([130, 50, 30])
-        purpleHigher = np.array([180, 255, 190])
-
         if average < 1:
             average = 1
 
-        cordList = [[], [], [], [], [], []]
+        cordList = [[], [], [], []]
         mask = None
 
         for laps in range(average):
 
             greenFrames = []
             redFrames = []
-            purpleFrames = []
 
             for i in range(iterations):
                 if picture is not None and iterations == 1 and average == 1:
                     frame = picture
                 else:
-                    frame = cam.takePicture()
-
-                blurred = cv2.GaussianBlur(frame, (7, 7), 0)
-                hsvFrame = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)  # From RGB
-                maskG = cv2.inRange(hsvFrame, greenLower, greenUpper)
-                greenFrames.append(maskG)
+                    frame = cam.takePicture(newFrame=True)
 
-                hsvFrame2 = cv2.cvtColor(blurred, cv2.COLOR_RGB2HSV)  # From BGR
-                maskR = cv2.inRange(hsvFrame2, redLower, redUpper)
-                redFrames.append(maskR)
-
-                maskBP = cv2.inRange(hsvFrame, purpleLower, purpleHigher)
-                purpleFrames.append(maskBP)
+                masks = self.segmenter.segment(frame)
+                greenFrames.append(masks["green"])
+                redFrames.append(masks["red"])
 
             greenSum = greenFrames.pop(0)
             if greenFrames:
@@ -142,20 +111,12 @@ class FindSnake:
                 for readFram in redFrames:
                     redSum = redSum + readFram
 
-            purpleSum = purpleFrames.pop(0)
-            if purpleFrames:
-                for purpleFrame in purpleFrames:
-                    purpleSum = purpleSum + purpleFrame
-
             redMask = cv2.erode(redSum, None, iterations=2)
             redMask = cv2.dilate(redMask, None, iterations=3)
 
             greenMask = cv2.erode(greenSum, None, iterations=4)
             greenMask = cv2.dilate(greenMask, None, iterations=4)
 
-            purpleMask = cv2.erode(purpleSum, None, iterations=0)
-            purpleMask = cv2.dilate(purpleMask, None, iterations=5)
-
             mask = greenMask + redMask
 
             greenCnts = cv2.findContours(greenMask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -164,10 +125,7 @@ class FindSnake:
             redCnts = cv2.findContours(redMask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             redCnts = imutils.grab_contours(redCnts)
 
-            purpleCnts = cv2.findContours(purpleMask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            purpleCnts = imutils.grab_contours(purpleCnts)
-
-            x0 = x1 = y0 = y1 = x3 = y3 = None
+            x0 = x1 = y0 = y1 = None
 
             if redCnts:
                 M = cv2.moments(redCnts[0])
@@ -179,18 +137,11 @@ class FindSnake:
                 x0 = int(M1["m10"] / M1["m00"])
                 y0 = int(M1["m01"] / M1["m00"])
 
-            if purpleCnts:
-                M2 = cv2.moments(purpleCnts[0])
-                x3 = int(M2["m10"] / M2["m00"])
-                y3 = int(M2["m01"] / M2["m00"])
-
             if x0 is not None and x1 is not None and y0 is not None and y1 is not None:
                 cordList[0].append(x0)
                 cordList[1].append(y0)
                 cordList[2].append(x1)
                 cordList[3].append(y1)
-                # cordList[4].append(x3)
-                # cordList[5].append(y3)
 
         if len(cordList[0]) < 3:
             filterExtreme = False
@@ -200,8 +151,6 @@ class FindSnake:
             y0 = self.average(cordList[1], filterExtreme)
             x1 = self.average(cordList[2], filterExtreme)
             y1 = self.average(cordList[3], filterExtreme)
-            # x3 = self.average(cordList[4], filterExtream)
-            # y3 = self.average(cordList[5], filterExtream)
             return [[x0, y0], [x1, y1]], cv2.cvtColor(mask, cv2.COLOR_GRAY2RGB)
         else:
             return None, cv2.cvtColor(mask, cv2.COLOR_GRAY2RGB)
@@ -4,10 +4,11 @@ Algorithm to find the target in the maze
 author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 """
 
+import math
 import cv2
 import imutils
-from scipy.spatial import distance as dist
 from Python.ImageProcessing.camera import Camera
+from Python.ImageProcessing.frameContext import FrameContext
 
 
 class FindTarget:
@@ -19,7 +20,7 @@ class FindTarget:
         """
         Checks the picture for a yellow target
 
-        :param picture: image to check
+        :param picture: image to check, or its FrameContext. The target is marked on a copy if the frame is shared
         :return: diameter, image with target marked, radius, center coordinates
         """
         try:
@@ -35,13 +36,12 @@ class FindTarget:
 
             yelowLower = (20, 100, 100)
             yellowHiger = (30, 255, 255)
-            frame = picture
+            context = FrameContext.of(picture)
 
             # Filtering of the pictures
             # 1 We blur the picture with Gaussian blur
-            blurred = cv2.GaussianBlur(frame, (11, 11), 0)
-            # 2 We change the colors to HSV
-            color = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+            # 2 We change the colors to HSV, both are shared with other detectors using the same frame
+            color = context.hsv((11, 11))
             # 3 Removes everyting that is not inside the Color range that is chosen
             mask = cv2.inRange(color, yelowLower, yellowHiger)
             # 4 Dilates the picture
@@ -59,12 +59,13 @@ class FindTarget:
                 ((x, y), radius) = cv2.minEnclosingCircle(c)
                 M = cv2.moments(c)
                 if radius > 15:
+                    frame = context.canvas()
                     center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
                     cv2.circle(frame, (int(x), int(y)), int(radius),
                                (0, 255, 255), 2)
                     cv2.circle(frame, center, 2, (0, 0, 255), -1)
             if x is not None and y is not None:
-                d = dist.euclidean((x, y), (0, 0))
+                d = math.hypot(x, y)
 
             if len(cnts) > 0 and d is not None and center is not None and radius is not None:
                 return d, frame, radius, center
@@ -0,0 +1,120 @@
+"""
+One picture with the blurred, HSV and grayscale versions the detectors need, made when first asked for and kept,
+so several detectors working on the same frame only pay for each conversion once.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import cv2
+
+
+class FrameContext:
+    """
+    Cache of the versions of one picture. The detectors in ImageProcessing take either a picture or a FrameContext,
+    a picture is wrapped in a FrameContext of its own. The picture and the cached versions are shared between the
+    detectors and must not be changed, a detector that draws on the picture draws on canvas() instead.
+    """
+
+    conversions = {"BGR": (cv2.COLOR_BGR2HSV, cv2.COLOR_BGR2GRAY),
+                   "RGB": (cv2.COLOR_RGB2HSV, cv2.COLOR_RGB2GRAY)}
+
+    def __init__(self, picture, colorOrder="BGR", shared=True):
+        """
+
+        :param picture: the picture
+        :param colorOrder: "BGR" for pictures from the overhead camera, "RGB" for pictures from the snake camera
+        :param shared: False if the picture is only used by one detector, so it can be drawn on directly
+        """
+        self.picture = picture
+        self.colorOrder = colorOrder
+        self.shared = shared
+        self.cache = {}
+
+    @staticmethod
+    def of(picture, colorOrder="BGR"):
+        """
+        Gets the FrameContext of a picture
+
+        :param picture: picture or FrameContext
+        :param colorOrder: colour order of the picture, not used if picture is a FrameContext
+        :return: picture if it is a FrameContext, else a new FrameContext the caller owns
+        """
+        if isinstance(picture, FrameContext):
+            return picture
+        return FrameContext(picture, colorOrder, shared=False)
+
+    @property
+    def shape(self):
+        """
+        Shape of the picture
+        """
+        return self.picture.shape
+
+    def cached(self, key, make):
+        """
+        Gets a version of the picture from the cache, and makes it if it is not there
+
+        :param key: key of the version
+        :param make: function that makes the version
+        :return: the version
+        """
+        if key not in self.cache:
+            self.cache[key] = make()
+        return self.cache[key]
+
+    def blurred(self, blurSize=None):
+        """
+        Gets the picture with a Gaussian blur
+
+        :param blurSize: size of the blur, None for the picture itself
+        :return: the blurred picture
+        """
+        if blurSize is None:
+            return self.picture
+        return self.cached(("blurred", tuple(blurSize)),
+                           lambda: cv2.GaussianBlur(self.picture, tuple(blurSize), 0))
+
+    def hsv(self, blurSize=None):
+        """
+        Gets the picture blurred and converted to HSV
+
+        :param blurSize: size of the blur before the conversion, None to not blur
+        :return: the picture in HSV
+        """
+        key = ("hsv", None if blurSize is None else tuple(blurSize))
+        return self.cached(key, lambda: cv2.cvtColor(self.blurred(blurSize), self.conversions[self.colorOrder][0]))
+
+    def gray(self, blurSize=None):
+        """
+        Gets the picture in grayscale. The blur is done on the grayscale picture, which is a third of the work of
+        blurring all three channels
+
+        :param blurSize: size of the blur after the conversion, None to not blur
+        :return: the picture in grayscale
+        """
+        if blurSize is None:
+            return self.cached(("gray", None),
+                               lambda: cv2.cvtColor(self.picture, self.conversions[self.colorOrder][1]))
+        return self.cached(("gray", tuple(blurSize)), lambda: cv2.GaussianBlur(self.gray(), tuple(blurSize), 0))
+
+    def canvas(self):
+        """
+        Gets a picture to draw on. That is the picture itself if only one detector uses it, else a copy
+
+        :return: picture to draw on
+        """
+        if self.shared:
+            return self.picture.copy()
+        return self.picture
+
+    def crop(self, x0, y0, x1, y1):
+        """
+        Makes a FrameContext of a part of the picture
+
+        :param x0: left edge
+        :param y0: top edge
+        :param x1: right edge
+        :param y1: bottom edge
+        :return: FrameContext of the part, sharing the pixels with this one
+        """
+        return FrameContext(self.picture[y0:y1, x0:x1], self.colorOrder, self.shared)
@@ -8,6 +8,7 @@ import os
 import numpy as np
 import cv2
 from Python.ImageProcessing.camera import Camera
+from Python.ImageProcessing.frameContext import FrameContext
 
 realtime = False
 stillPic = False
@@ -28,11 +29,10 @@ class mazeRecognizer:
         Filters a given picture, by blurring,
         edge detecting then trying to remove noise.
 
-        :param picture: Picture to filter \n
+        :param picture: Picture to filter, or its FrameContext \n
         :return: The picture filtered \n
         """
-        grayfilt = cv2.cvtColor(picture, cv2.COLOR_BGR2GRAY)
-        grayfilt = cv2.GaussianBlur(grayfilt, (9, 9), 0)
+        grayfilt = FrameContext.of(picture).gray((9, 9))
 
         edges = cv2.Canny(grayfilt, 50, 120, apertureSize=3)
         edges = cv2.dilate(edges, None, iterations=3)
@@ -42,21 +42,37 @@ class mazeRecognizer:
 
         return edges
 
-    def findMaze(self):
+    def findLines(self, picture):
         """
-        Finds the walls of the maze using picture taken from the overhead camera
+        Finds the walls of the maze in a picture
 
-        :return: List of lines (in x1y1, x2y2 coordinates) and picture
+        :param picture: BGR picture of the maze, or its FrameContext
+        :return: List of lines (in x1y1, x2y2 coordinates) as returned from HoughLinesP
+        """
+        edges = self.filtering(picture)
+        return cv2.HoughLinesP(edges, 1, np.pi / 1000, 50, maxLineGap=90, minLineLength=80)
+
+    def takePicture(self):
+        """
+        Gets the picture to find the maze in, the test picture perf2.jpg when testing is set
+
+        :return: the picture
         """
         if testing:
-            pic2 = cv2.imread(
-                os.getcwd() + "\\" + "..\\..\\Pictures\\DeadEnds\\perf2.jpg", -1)
-        else:
-            pic2 = self.cam.takePicture()
+            return cv2.imread(os.getcwd() + "\\" + "..\\..\\Pictures\\DeadEnds\\perf2.jpg", -1)
+        return self.cam.takePicture()
 
-        edges2 = self.filtering(pic2)
+    def findMaze(self, picture=None):
+        """
+        Finds the walls of the maze using picture taken from the overhead camera
+
+        :param picture: picture or FrameContext to use instead of taking a new picture
+        :return: List of lines (in x1y1, x2y2 coordinates) and picture
+        """
+        context = FrameContext.of(self.takePicture() if picture is None else picture)
 
-        lines2 = cv2.HoughLinesP(edges2, 1, np.pi / 1000, 50, maxLineGap=90, minLineLength=80)
+        lines2 = self.findLines(context)
+        pic2 = context.canvas()
 
         for data in lines2:
             x1 = data[0][0]
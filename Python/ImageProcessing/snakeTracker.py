@@ -0,0 +1,121 @@
+"""
+Tracks the snake between pictures, so only the area around where it was last seen has to be searched.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import numpy as np
+from Python.ImageProcessing.findSnake import FindSnake
+from Python.ImageProcessing.frameContext import FrameContext
+
+
+class SnakeTracker:
+    """
+    Finds the snake with FindSnake in a region of interest around where it is expected to be. The region is the box
+    around the last position and the position predicted from the last movement, with padding. The whole picture is
+    searched when the snake has not been seen yet, when it is not found in the region, or when it is found so close
+    to the edge of the region that part of it may be outside.
+    """
+
+    def __init__(self, findSnake=None, padding=120, edgeMargin=15):
+        """
+
+        :param findSnake: FindSnake to locate the snake with, None to make one
+        :param padding: pixels added on every side of the box around the snake
+        :param edgeMargin: a snake part closer than this to the edge of the region is not trusted
+        """
+        self.findSnake = findSnake if findSnake is not None else FindSnake()
+        self.padding = padding
+        self.edgeMargin = edgeMargin
+        self.lastCoordinates = None
+        self.velocity = None
+        self.roiSearches = 0
+        self.fullSearches = 0
+
+    def reset(self):
+        """
+        Forgets where the snake was, so the next search is on the whole picture
+
+        :return: None
+        """
+        self.lastCoordinates = None
+        self.velocity = None
+
+    def regionOfInterest(self, shape):
+        """
+        Finds the part of the picture to search
+
+        :param shape: shape of the picture
+        :return: (x0, y0, x1, y1) of the region, None if the whole picture has to be searched
+        """
+        if self.lastCoordinates is None:
+            return None
+        points = np.array(self.lastCoordinates, dtype=np.float64)
+        if self.velocity is not None:
+            points = np.vstack((points, points + self.velocity))
+
+        height, width = shape[:2]
+        x0 = max(int(points[:, 0].min()) - self.padding, 0)
+        y0 = max(int(points[:, 1].min()) - self.padding, 0)
+        x1 = min(int(points[:, 0].max()) + self.padding, width)
+        y1 = min(int(points[:, 1].max()) + self.padding, height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+    def insideRegion(self, coordinates, roi, shape):
+        """
+        Checks that the snake parts are not on the edge of the region, unless that edge is the edge of the picture
+
+        :param coordinates: coordinates of the snake parts in the picture
+        :param roi: (x0, y0, x1, y1) of the region
+        :param shape: shape of the picture
+        :return: True if the parts are inside the region
+        """
+        x0, y0, x1, y1 = roi
+        height, width = shape[:2]
+        for x, y in coordinates:
+            if (x0 > 0 and x < x0 + self.edgeMargin) or (y0 > 0 and y < y0 + self.edgeMargin) or \
+                    (x1 < width and x > x1 - self.edgeMargin) or (y1 < height and y > y1 - self.edgeMargin):
+                return False
+        return True
+
+    def locate(self, picture):
+        """
+        Locates the snake, same as FindSnake.locateSnakeAverage(1, 1, picture=picture)
+
+        :param picture: picture or FrameContext to find the snake in
+        :return: coordinates of snake parts, masked picture of the whole picture, None if no coordinates are found
+        """
+        context = FrameContext.of(picture)
+        roi = self.regionOfInterest(context.shape)
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            coordinates, roiMask = self.findSnake.locateSnakeAverage(1, 1, picture=context.crop(x0, y0, x1, y1))
+            self.roiSearches += 1
+            if coordinates is not None:
+                coordinates = [[x + x0, y + y0] for x, y in coordinates]
+                if self.insideRegion(coordinates, roi, context.shape):
+                    mask = np.zeros(context.shape[:2] + (3,), dtype=np.uint8)
+                    mask[y0:y1, x0:x1] = roiMask
+                    self.update(coordinates)
+                    return coordinates, mask
+
+        coordinates, mask = self.findSnake.locateSnakeAverage(1, 1, picture=context)
+        self.fullSearches += 1
+        if coordinates is None:
+            self.reset()
+        else:
+            self.update(coordinates)
+        return coordinates, mask
+
+    def update(self, coordinates):
+        """
+        Remembers where the snake was found and how far it moved since the last picture
+
+        :param coordinates: coordinates of the snake parts
+        :return: None
+        """
+        if self.lastCoordinates is not None:
+            self.velocity = np.array(coordinates, dtype=np.float64) - np.array(self.lastCoordinates, dtype=np.float64)
+        self.lastCoordinates = coordinates
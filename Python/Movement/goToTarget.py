@@ -48,14 +48,28 @@ class GoToTarget:
         self.readyToMoveBackward = False
         self.ampChanged = False
         self.colliding = False
+        # Set when the snake has been pushed away from the path, the controller replans and resets it
+        self.replan = False
+        # False if the controller can not replan this path, then replan is never set
+        self.replanEnabled = True
 
         # Path variables
         self.i = 0
         self.goalReached = False
+        # Distance from the path the snake can drift before a new path is requested
+        self.maxDeviation = 150
 
         # Regulation variables
         self.propGain = 0.5
 
+    def requestReplan(self):
+        """
+        Asks the controller for a new path, if the path can be replanned
+        :return: None
+        """
+        if self.replanEnabled:
+            self.replan = True
+
     def checkMovement(self, wantedMovement, args=None):
         """
         Uses collision handler to check if there are any collisions before doing movement
@@ -99,6 +113,7 @@ class GoToTarget:
                 self.ampChanged = True
                 self.readyToMoveForward = False
                 self.readyToMoveBackward = True
+                self.requestReplan()
             # Checking right sector
             elif self.snakeCollision.rightSectorCollision():
                 # Lateral shift left, ready to move backwards
@@ -108,6 +123,7 @@ class GoToTarget:
                 self.ampChanged = True
                 self.readyToMoveForward = False
                 self.readyToMoveBackward = True
+                self.requestReplan()
             # If only collision in front
             else:
                 # Back it up motherfucker
@@ -146,6 +162,7 @@ class GoToTarget:
                 self.ampChanged = True
                 self.readyToMoveForward = False
                 self.readyToMoveBackward = False
+                self.requestReplan()
             # Checking right sector
             elif self.snakeCollision.rightSectorCollision():
                 # Reset moving flags, and lateral shift left
@@ -155,6 +172,7 @@ class GoToTarget:
                 self.ampChanged = True
                 self.readyToMoveBackward = False
                 self.readyToMoveForward = False
+                self.requestReplan()
         return moving
 
     def calculateOffset(self, snakeCoordinates):
@@ -306,6 +324,11 @@ class GoToTarget:
                                                                   snakePointF)
         self.checkForNewNode(lV, sV, lineEnd, snakePointF)
 
+        distanceToLine = self.snakeController.calculatDistanceToLine(lV, snakePointF, lineStart)
+        if abs(distanceToLine) > self.maxDeviation:
+            Logger.logg(f"Snake is {abs(distanceToLine):.0f} px from the path, asking for a new path", Logger.info)
+            self.requestReplan()
+
         self.goalReached = self.checkForGoal()
 
         if not self.goalReached:
@@ -43,6 +43,9 @@ class SeekAndDestroy(GoToTarget):
         # Objects
         self.findTarget = FindTarget()
 
+        # The controller does not replan the paths between the dead ends
+        self.replanEnabled = False
+
         # Path Variables
         self.j = 0
         self.totalPath = path
@@ -5,7 +5,6 @@ author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 """
 
 import math
-from shapely.geometry import LineString, Point
 from Python.logger import Logger
 from Python.ImageProcessing.checkPathForObst import CheckPathForObst
 
@@ -173,6 +172,9 @@ class SnakeCollision:
         self.backBackLeftLim = backBackLeftLim
         self.backLeftLim = backLeftLim
 
+        # ClearanceMap of the maze, lets parts far away from every wall skip the per-wall checks
+        self.clearanceMap = None
+
         self.frontRightCollision = False
         self.frontFrontCollision = False
         self.frontLeftCollision = False
@@ -197,6 +199,8 @@ class SnakeCollision:
         :param distThreshold: the threshold to check collision against
         :return: None
         """
+        # Imported here so the program can start without loading shapely, see Python.startup
+        from shapely.geometry import LineString, Point
 
         snakeFront = Point(snakeCoordList[0][0], snakeCoordList[0][1])
         snakeMid = Point(snakeCoordList[1][0], snakeCoordList[1][1])
@@ -211,13 +215,22 @@ class SnakeCollision:
 
         self.resetCollisions()
 
+        # The sector lines are distThreshold long, so a part further than that from every wall can not collide
+        frontNear = True
+        midNear = True
+        if self.clearanceMap is not None:
+            frontNear = self.clearanceMap.distanceAt(snakeFront.x, snakeFront.y) < distThreshold
+            midNear = self.clearanceMap.distanceAt(snakeMid.x, snakeMid.y) < distThreshold
+            if not frontNear and not midNear:
+                return
+
         for data in self.mazeLines:
             x1 = data[0][0]
             y1 = data[0][1]
             x2 = data[0][2]
             y2 = data[0][3]
             obst = LineString([(x1, y1), (x2, y2)])
-            dist = obst.distance(snakeFront)
+            dist = obst.distance(snakeFront) if frontNear else float("inf")
 
             if dist < distThreshold:
                 closestPoint = self.getClosestPoint([x1, y1], [x2, y2], [snakeFront.x, snakeFront.y])
@@ -244,7 +257,7 @@ class SnakeCollision:
                         f"front right collision @closet point: {closestPoint} snake pos: {snakeFront.x}, {snakeFront.y}",
                         Logger.info)
 
-            dist2 = obst.distance(snakeMid)
+            dist2 = obst.distance(snakeMid) if midNear else float("inf")
             if dist2 < distThreshold:
                 closestPoint2 = self.getClosestPoint([x1, y1], [x2, y2], [snakeMid.x, snakeMid.y])
                 angleToPoint2 = self.calculateAngleToNearestPoint(snakeCoordList, [snakeMid.x, snakeMid.y],
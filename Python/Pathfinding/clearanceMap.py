@@ -0,0 +1,183 @@
+"""
+Precomputed distance field for the maze. Since the maze does not change during a run, the distance to the nearest
+wall is calculated once for a downsampled grid, and collision checks become lookups in this grid.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import math
+import cv2
+import numpy as np
+
+
+class ClearanceMap:
+    """
+    Downsampled distance transform of the maze lines, with the gradient of the distance. \n
+    Lookups are conservative: the distance returned is never bigger than the real distance to the closest wall.
+    """
+
+    def __init__(self, lineList, width=1920, height=1080, scale=4):
+        """
+
+        :param lineList: list of lines for obstacles, as returned from HoughLinesP ([[x1, y1, x2, y2]], ...)
+        :param width: width of the picture the lines are from
+        :param height: height of the picture the lines are from
+        :param scale: pixels per cell in the map, higher is faster to build but less accurate
+        """
+        self.scale = scale
+        if lineList is None or len(lineList) == 0:
+            walls = np.empty((0, 4), dtype=np.float64)
+        else:
+            walls = np.asarray(lineList, dtype=np.float64).reshape(-1, 4)
+            width = max(width, int(walls[:, [0, 2]].max()) + 1)
+            height = max(height, int(walls[:, [1, 3]].max()) + 1)
+
+        self.cols = int(math.ceil(width / scale)) + 1
+        self.rows = int(math.ceil(height / scale)) + 1
+
+        # Walls are drawn as 0 on a 255 background, cv2.line uses fixed-point coordinates with 4 fractional bits
+        occupancy = np.full((self.rows, self.cols), 255, dtype=np.uint8)
+        for x1, y1, x2, y2 in walls:
+            cv2.line(occupancy, (int(round(x1 / scale * 16)), int(round(y1 / scale * 16))),
+                     (int(round(x2 / scale * 16)), int(round(y2 / scale * 16))), 0, 1, cv2.LINE_8, 4)
+
+        if len(walls):
+            self.distance = cv2.distanceTransform(occupancy, cv2.DIST_L2, cv2.DIST_MASK_PRECISE) * scale
+        else:
+            # No wall is closer than the diagonal of the map. A finite value keeps the gradient and the interpolation
+            # free of inf - inf
+            self.distance = np.full((self.rows, self.cols), math.hypot(self.cols, self.rows) * scale,
+                                    dtype=np.float32)
+
+        gradY, gradX = np.gradient(self.distance.astype(np.float64))
+        length = np.hypot(gradX, gradY)
+        length[length == 0] = 1
+        self.gradientX = gradX / length
+        self.gradientY = gradY / length
+
+        # Rasterizing the walls and interpolating between cells both can be off by half a cell diagonal
+        self.margin = scale * math.sqrt(2)
+
+    def sample(self, grid, x, y):
+        """
+        Bilinear interpolation in one of the grids
+
+        :param grid: the grid to sample
+        :param x: x coordinates in pixels, number or array
+        :param y: y coordinates in pixels, number or array
+        :return: the interpolated values
+        """
+        gx = np.clip(np.asarray(x, dtype=np.float64) / self.scale, 0, self.cols - 1)
+        gy = np.clip(np.asarray(y, dtype=np.float64) / self.scale, 0, self.rows - 1)
+        x0 = np.floor(gx).astype(np.intp)
+        y0 = np.floor(gy).astype(np.intp)
+        x1 = np.minimum(x0 + 1, self.cols - 1)
+        y1 = np.minimum(y0 + 1, self.rows - 1)
+        fx = gx - x0
+        fy = gy - y0
+
+        top = grid[y0, x0] * (1 - fx) + grid[y0, x1] * fx
+        bottom = grid[y1, x0] * (1 - fx) + grid[y1, x1] * fx
+        return top * (1 - fy) + bottom * fy
+
+    def distanceAt(self, x, y):
+        """
+        Gets the clearance, the distance to the nearest wall, at a set of coordinates
+
+        :param x: x coordinates in pixels, number or array
+        :param y: y coordinates in pixels, number or array
+        :return: lower bound of the distance to the nearest wall, never negative
+        """
+        return np.maximum(self.sample(self.distance, x, y) - self.margin, 0.0)
+
+    def gradientAt(self, x, y):
+        """
+        Gets the direction away from the nearest wall
+
+        :param x: x coordinate in pixels
+        :param y: y coordinate in pixels
+        :return: (x, y) unit vector pointing away from the nearest wall
+        """
+        gx = float(self.sample(self.gradientX, x, y))
+        gy = float(self.sample(self.gradientY, x, y))
+        length = math.hypot(gx, gy)
+        if length == 0:
+            return 0.0, 0.0
+        return gx / length, gy / length
+
+    def closestPoint(self, x, y):
+        """
+        Estimates the closest point on a wall by following the gradient back towards the wall
+
+        :param x: x coordinate in pixels
+        :param y: y coordinate in pixels
+        :return: (x, y) of the estimated closest point
+        """
+        dist = float(self.sample(self.distance, x, y))
+        gx, gy = self.gradientAt(x, y)
+        return [x - gx * dist, y - gy * dist]
+
+    def segmentClearance(self, segments):
+        """
+        Samples the clearance along segments, with at most one cell between the samples
+
+        :param segments: array-like of shape (n, 4) with x1, y1, x2, y2 for each segment
+        :return: array of shape (n,) with a lower bound of the smallest clearance along each segment
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        if len(segments) == 0:
+            return np.empty(0)
+
+        lengths = np.hypot(segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1])
+        samples = int(math.ceil(lengths.max() / self.scale)) + 1
+        t = np.linspace(0.0, 1.0, max(samples, 2))[None, :]
+        xs = segments[:, 0, None] + (segments[:, 2, None] - segments[:, 0, None]) * t
+        ys = segments[:, 1, None] + (segments[:, 3, None] - segments[:, 1, None]) * t
+        # Between two samples the clearance can drop by at most half the sample spacing
+        return np.maximum(self.distanceAt(xs, ys).min(axis=1) - self.scale / 2, 0.0)
+
+    def checker(self, edgeDistance):
+        """
+        Gets a collision checker that uses this map
+
+        :param edgeDistance: distance to keep from the obstacles
+        :return: ClearanceChecker
+        """
+        return ClearanceChecker(self, edgeDistance)
+
+
+class ClearanceChecker:
+    """
+    Collision checker with the same methods as CollisionChecker, but looking up the distances in a ClearanceMap.
+    """
+
+    def __init__(self, clearanceMap, edgeDistance):
+        """
+
+        :param clearanceMap: ClearanceMap of the maze
+        :param edgeDistance: distance to keep from the obstacles
+        """
+        self.clearanceMap = clearanceMap
+        self.edgeDistance = edgeDistance
+
+    def checkSegments(self, segments):
+        """
+        Checks a batch of segments for collision
+
+        :param segments: array-like of shape (n, 4) with x1, y1, x2, y2 for each segment
+        :return: boolean array, True if no collision, False if collision
+        """
+        clearance = self.clearanceMap.segmentClearance(segments)
+        return (clearance > 0) & (clearance >= self.edgeDistance)
+
+    def checkSegment(self, x1, y1, x2, y2):
+        """
+        Checks one segment for collision
+
+        :param x1: x start of the segment
+        :param y1: y start of the segment
+        :param x2: x end of the segment
+        :param y2: y end of the segment
+        :return: True if no collision, False if collision
+        """
+        return bool(self.checkSegments([[x1, y1, x2, y2]])[0])
@@ -0,0 +1,161 @@
+"""
+Collision checking of path segments against the maze walls, done on all the walls at once with numpy instead of
+building a shapely LineString for every wall.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import numpy as np
+
+
+class CollisionChecker:
+    """
+    Converts the lines from HoughLinesP to numpy arrays once, then checks segments against every wall with
+    vectorized segment to segment distances. Gives the same result as RRT.checkObstacle.
+    """
+
+    def __init__(self, lineList, edgeDistance):
+        """
+
+        :param lineList: list of lines for obstacles, as returned from HoughLinesP ([[x1, y1, x2, y2]], ...)
+        :param edgeDistance: distance to keep from the obstacles
+        """
+        if lineList is None or len(lineList) == 0:
+            walls = np.empty((0, 4), dtype=np.float64)
+        else:
+            walls = np.asarray(lineList, dtype=np.float64).reshape(-1, 4)
+
+        self.edgeDistance = edgeDistance
+        self.wx1 = walls[:, 0]
+        self.wy1 = walls[:, 1]
+        self.wx2 = walls[:, 2]
+        self.wy2 = walls[:, 3]
+        # Box around every wall, grown by the edge distance. A segment outside the box is far enough from the wall
+        self.boxMinX = np.minimum(self.wx1, self.wx2) - edgeDistance
+        self.boxMaxX = np.maximum(self.wx1, self.wx2) + edgeDistance
+        self.boxMinY = np.minimum(self.wy1, self.wy2) - edgeDistance
+        self.boxMaxY = np.maximum(self.wy1, self.wy2) + edgeDistance
+
+    def segmentDistances(self, x1, y1, x2, y2):
+        """
+        Calculates the shortest distance between segments and every wall.
+
+        :param x1: x start of the segments, array of shape (n,)
+        :param y1: y start of the segments
+        :param x2: x end of the segments
+        :param y2: y end of the segments
+        :return: array of shape (n, number of walls) with the distances, 0 where they intersect
+        """
+        x1 = np.asarray(x1, dtype=np.float64)[:, None]
+        y1 = np.asarray(y1, dtype=np.float64)[:, None]
+        x2 = np.asarray(x2, dtype=np.float64)[:, None]
+        y2 = np.asarray(y2, dtype=np.float64)[:, None]
+        return self.pairDistances(x1, y1, x2, y2, self.wx1, self.wy1, self.wx2, self.wy2)
+
+    @classmethod
+    def pairDistances(cls, x1, y1, x2, y2, wx1, wy1, wx2, wy2):
+        """
+        Shortest distance between segments and walls, broadcasting over the arrays
+
+        :param x1: x start of the segments
+        :param y1: y start of the segments
+        :param x2: x end of the segments
+        :param y2: y end of the segments
+        :param wx1: x start of the walls
+        :param wy1: y start of the walls
+        :param wx2: x end of the walls
+        :param wy2: y end of the walls
+        :return: the distances, 0 where they intersect
+        """
+        # Closest distance from the four end points to the other segment
+        dist = np.minimum(cls.pointSegmentDistance(x1, y1, wx1, wy1, wx2, wy2),
+                          cls.pointSegmentDistance(x2, y2, wx1, wy1, wx2, wy2))
+        dist = np.minimum(dist, cls.pointSegmentDistance(wx1, wy1, x1, y1, x2, y2))
+        dist = np.minimum(dist, cls.pointSegmentDistance(wx2, wy2, x1, y1, x2, y2))
+
+        return np.where(cls.crossing(x1, y1, x2, y2, wx1, wy1, wx2, wy2), 0.0, dist)
+
+    @classmethod
+    def crossing(cls, x1, y1, x2, y2, wx1, wy1, wx2, wy2):
+        """
+        Finds the segments and walls that properly cross each other, broadcasting over the arrays. Touching and
+        collinear overlap are not crossing, those already have a distance of 0.
+
+        :return: boolean array, True where they cross
+        """
+        o1 = cls.cross(wx1, wy1, wx2, wy2, x1, y1)
+        o2 = cls.cross(wx1, wy1, wx2, wy2, x2, y2)
+        o3 = cls.cross(x1, y1, x2, y2, wx1, wy1)
+        o4 = cls.cross(x1, y1, x2, y2, wx2, wy2)
+        return (o1 * o2 < 0) & (o3 * o4 < 0)
+
+    def checkSegments(self, segments):
+        """
+        Checks a batch of segments for collision
+
+        :param segments: array-like of shape (n, 4) with x1, y1, x2, y2 for each segment
+        :return: boolean array, True if no collision, False if collision
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        if len(self.wx1) == 0:
+            return np.ones(len(segments), dtype=bool)
+
+        x1, y1, x2, y2 = segments.T
+        # Only the walls whose box the segment reaches into can be too close, the distances are found for those pairs
+        near = (np.minimum(x1, x2)[:, None] <= self.boxMaxX) & (np.maximum(x1, x2)[:, None] >= self.boxMinX) & \
+               (np.minimum(y1, y2)[:, None] <= self.boxMaxY) & (np.maximum(y1, y2)[:, None] >= self.boxMinY)
+        rows, cols = np.nonzero(near)
+        # A segment that crosses a wall collides, the distances are only needed for the rest
+        free = np.ones(len(segments), dtype=bool)
+        free[rows[self.crossing(x1[rows], y1[rows], x2[rows], y2[rows],
+                                self.wx1[cols], self.wy1[cols], self.wx2[cols], self.wy2[cols])]] = False
+        keep = free[rows]
+        rows, cols = rows[keep], cols[keep]
+        dist = self.pairDistances(x1[rows], y1[rows], x2[rows], y2[rows],
+                                  self.wx1[cols], self.wy1[cols], self.wx2[cols], self.wy2[cols])
+        free[rows[(dist <= 0) | (dist < self.edgeDistance)]] = False
+        return free
+
+    def checkSegment(self, x1, y1, x2, y2):
+        """
+        Checks one segment for collision
+
+        :param x1: x start of the segment
+        :param y1: y start of the segment
+        :param x2: x end of the segment
+        :param y2: y end of the segment
+        :return: True if no collision, False if collision
+        """
+        return bool(self.checkSegments([[x1, y1, x2, y2]])[0])
+
+    @staticmethod
+    def pointSegmentDistance(px, py, ax, ay, bx, by):
+        """
+        Distance from points to segments, broadcasting over the arrays
+
+        :param px: x of the points
+        :param py: y of the points
+        :param ax: x start of the segments
+        :param ay: y start of the segments
+        :param bx: x end of the segments
+        :param by: y end of the segments
+        :return: the distances
+        """
+        dx = bx - ax
+        dy = by - ay
+        lengthSq = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = ((px - ax) * dx + (py - ay) * dy) / lengthSq
+        t = np.where(lengthSq > 0, np.clip(t, 0.0, 1.0), 0.0)
+        cx = ax + t * dx - px
+        cy = ay + t * dy - py
+        return np.sqrt(cx * cx + cy * cy)
+
+    @staticmethod
+    def cross(ax, ay, bx, by, cx, cy):
+        """
+        Cross product of AB and AC, tells which side of AB the point C is on
+
+        :return: positive if left, negative if right, 0 if on the line
+        """
+        return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
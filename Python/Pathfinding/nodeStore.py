@@ -0,0 +1,129 @@
+"""
+Struct-of-arrays storage for the RRT-trees. The position, parent and cost of every node are kept in numpy arrays
+that grow geometrically, so the whole tree can be searched with vectorized queries.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import numpy as np
+
+NO_PARENT = -1
+
+
+class NodeStore:
+    """
+    Preallocated arrays for x, y, parent index and cost of the nodes in a tree. The index of a node is the order
+    it was added in, same as in node_list. Also works as a node index for the planners, with nearest and near.
+    """
+
+    def __init__(self, capacity=1024):
+        """
+
+        :param capacity: number of nodes to make room for before the arrays have to grow
+        """
+        capacity = max(int(capacity), 1)
+        self.count = 0
+        self.x = np.empty(capacity, dtype=np.float64)
+        self.y = np.empty(capacity, dtype=np.float64)
+        self.parent = np.empty(capacity, dtype=np.int64)
+        self.cost = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        return len(self.x)
+
+    def grow(self):
+        """
+        Doubles the size of the arrays
+
+        :return: None
+        """
+        capacity = self.capacity * 2
+        for name in ("x", "y", "parent", "cost"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, x, y, parent=NO_PARENT, cost=0.0):
+        """
+        Adds a node to the store
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :param parent: index of the parent node, NO_PARENT for the root
+        :param cost: cost of the path from the root to the node
+        :return: index of the node
+        """
+        if self.count == self.capacity:
+            self.grow()
+        index = self.count
+        self.x[index] = x
+        self.y[index] = y
+        self.parent[index] = parent
+        self.cost[index] = cost
+        self.count += 1
+        return index
+
+    def insert(self, x, y):
+        """
+        Adds a node without parent or cost, so the store can be used like the indexes in spatialIndex
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the node
+        """
+        return self.add(x, y)
+
+    def nearest(self, x, y):
+        """
+        Finds the node closest to the coordinates. On equal distance the node added first is returned.
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the nearest node, None if the store is empty
+        """
+        if self.count == 0:
+            return None
+        dx = self.x[:self.count] - x
+        dy = self.y[:self.count] - y
+        return int(np.argmin(dx * dx + dy * dy))
+
+    def near(self, x, y, radius):
+        """
+        Finds all nodes within a radius of the coordinates
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :param radius: radius to search within
+        :return: list of indexes, in the order they were added
+        """
+        dx = self.x[:self.count] - x
+        dy = self.y[:self.count] - y
+        return np.flatnonzero(dx * dx + dy * dy <= radius ** 2).tolist()
+
+    def edges(self):
+        """
+        Gets every edge in the tree, from parent to child
+
+        :return: numpy array of shape (n, 4) with x1, y1, x2, y2 for every edge
+        """
+        children = np.flatnonzero(self.parent[:self.count] != NO_PARENT)
+        parents = self.parent[children]
+        return np.column_stack((self.x[parents], self.y[parents], self.x[children], self.y[children]))
+
+    def pathTo(self, index):
+        """
+        Follows the parents from a node back to the root
+
+        :param index: index of the node to start in
+        :return: list of [x, y] from the node to the root
+        """
+        path = []
+        while index != NO_PARENT:
+            path.append([float(self.x[index]), float(self.y[index])])
+            index = int(self.parent[index])
+        return path
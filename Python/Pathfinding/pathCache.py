@@ -0,0 +1,168 @@
+"""
+Cache of planned paths. The maze and the target rarely change between two presses on "Find Path", so a path that
+was planned for the same maze, from about the same start to about the same goal, can be used again instead of
+planning from scratch.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+from Python.logger import Logger
+from Python.Pathfinding.pathSmoothing import pathIsFree
+
+
+class PathCache:
+    """
+    Least recently used cache of paths, keyed by a fingerprint of the maze lines and the cells of the start and the
+    goal. Paths are checked against the walls again before they are returned. Can be saved to a file so the cache
+    survives a restart.
+    """
+
+    def __init__(self, capacity=32, cellSize=25, lineResolution=5, filename=None):
+        """
+
+        :param capacity: max number of paths to keep, the least recently used path is removed first
+        :param cellSize: size in pixels of the cells start and goal are rounded to
+        :param lineResolution: size in pixels the line coordinates are rounded to, so small changes in the maze
+            recognition still give the same maze
+        :param filename: file to save the cache to and load it from, None to only keep it in memory
+        """
+        self.capacity = capacity
+        self.cellSize = cellSize
+        self.lineResolution = lineResolution
+        self.filename = filename
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if filename is not None and os.path.exists(filename):
+            self.load()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def mazeFingerprint(self, lineList):
+        """
+        Hashes the maze lines. The coordinates are rounded, and the lines are sorted so the order HoughLinesP found
+        them in does not matter.
+
+        :param lineList: list of lines for obstacles, as returned from HoughLinesP
+        :return: hex digest of the maze
+        """
+        if lineList is None or len(lineList) == 0:
+            return hashlib.sha1(b"").hexdigest()
+        lines = np.round(np.asarray(lineList, dtype=np.float64).reshape(-1, 4) / self.lineResolution).astype(np.int64)
+        # A line from a to b is the same wall as a line from b to a
+        flip = (lines[:, 0] > lines[:, 2]) | ((lines[:, 0] == lines[:, 2]) & (lines[:, 1] > lines[:, 3]))
+        lines[flip] = lines[flip][:, [2, 3, 0, 1]]
+        lines = lines[np.lexsort(lines.T[::-1])]
+        return hashlib.sha1(lines.tobytes()).hexdigest()
+
+    def cellOf(self, point):
+        """
+        Gets the cell a point is in
+
+        :param point: [x, y]
+        :return: (column, row)
+        """
+        return int(point[0] // self.cellSize), int(point[1] // self.cellSize)
+
+    def key(self, lineList, start, goal):
+        """
+        Makes the cache key for a path
+
+        :param lineList: list of lines for obstacles
+        :param start: start point
+        :param goal: goal point
+        :return: tuple of the maze fingerprint, start cell and goal cell
+        """
+        return self.mazeFingerprint(lineList), self.cellOf(start), self.cellOf(goal)
+
+    def get(self, lineList, start, goal, checker):
+        """
+        Looks for a path planned for the same maze, start cell and goal cell. The ends of the path are moved to the
+        exact start and goal, and the path is checked for collision before it is returned.
+
+        :param lineList: list of lines for obstacles
+        :param start: start point
+        :param goal: goal point
+        :param checker: collision checker with checkSegments
+        :return: the path from goal to start, None if there is no valid path in the cache
+        """
+        key = self.key(lineList, start, goal)
+        cached = self.paths.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+
+        path = [list(goal)] + [list(p) for p in cached[1:-1]] + [list(start)]
+        if not pathIsFree(path, checker):
+            Logger.logg("Cached path collides with the maze, planning a new one", Logger.info)
+            del self.paths[key]
+            self.misses += 1
+            return None
+
+        self.paths.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def put(self, lineList, start, goal, path):
+        """
+        Adds a path to the cache, and saves the cache if it has a file
+
+        :param lineList: list of lines for obstacles
+        :param start: start point
+        :param goal: goal point
+        :param path: the path from goal to start, as returned from the planners
+        :return: None
+        """
+        if path is None:
+            return
+        key = self.key(lineList, start, goal)
+        self.paths[key] = [list(p) for p in path]
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)
+
+        if self.filename is not None:
+            self.save()
+
+    def clear(self):
+        """
+        Removes every path from the cache
+
+        :return: None
+        """
+        self.paths.clear()
+
+    def save(self):
+        """
+        Saves the cache to its file
+
+        :return: None
+        """
+        with open(self.filename, "wb") as f:
+            pickle.dump({"cellSize": self.cellSize, "lineResolution": self.lineResolution,
+                         "paths": list(self.paths.items())}, f)
+
+    def load(self):
+        """
+        Loads the cache from its file. Nothing is loaded if the file was saved with other cell sizes.
+
+        :return: None
+        """
+        try:
+            with open(self.filename, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            Logger.logg(f"Could not load path cache: {e}", Logger.info)
+            return
+
+        if data.get("cellSize") != self.cellSize or data.get("lineResolution") != self.lineResolution:
+            return
+        self.paths = OrderedDict(data["paths"][-self.capacity:])
@@ -0,0 +1,192 @@
+"""
+Post-processing of the paths from the planners. The waypoints from RRT* zigzag, and every kink costs the snake a
+rotation or a lateral shift. The path is shortened by skipping waypoints that can be seen from each other. The
+remaining corners can be rounded into arcs where the heading changes at most a given angle at every waypoint, so the
+snake can take them without stopping to rotate, and the path can be resampled to a fixed spacing. Both add
+waypoints, so optimizePath only does them when asked for.
+
+Every step checks its result against the maze with a collision checker (CollisionChecker or ClearanceChecker),
+so the optimized path keeps the same distance to the walls as the planner did.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import math
+
+
+def pathIsFree(path, checker):
+    """
+    Checks every segment of a path for collision
+
+    :param path: list of [x, y]
+    :param checker: collision checker with checkSegments
+    :return: True if no segment collides
+    """
+    if len(path) < 2:
+        return True
+    segments = [[path[i][0], path[i][1], path[i + 1][0], path[i + 1][1]] for i in range(len(path) - 1)]
+    return bool(checker.checkSegments(segments).all())
+
+
+def shortcutPath(path, checker):
+    """
+    Greedy line-of-sight shortcutting. From each waypoint, jumps to the furthest later waypoint that can be reached
+    in a straight line without collision.
+
+    :param path: list of [x, y]
+    :param checker: collision checker with checkSegments
+    :return: the shortened path, with the same first and last point
+    """
+    if len(path) < 3:
+        return [list(p) for p in path]
+
+    shortcut = [list(path[0])]
+    i = 0
+    while i < len(path) - 1:
+        candidates = range(i + 1, len(path))
+        segments = [[path[i][0], path[i][1], path[j][0], path[j][1]] for j in candidates]
+        free = checker.checkSegments(segments)
+        # The next waypoint is always kept, even if the original segment is not free any more
+        nextIndex = i + 1
+        for j, noCollision in zip(candidates, free):
+            if noCollision:
+                nextIndex = j
+        shortcut.append(list(path[nextIndex]))
+        i = nextIndex
+    return shortcut
+
+
+def turnAngles(path):
+    """
+    Calculates how much the heading changes at every waypoint between the first and the last
+
+    :param path: list of [x, y]
+    :return: list of the turn angles in degrees, between 0 and 180
+    """
+    angles = []
+    for i in range(1, len(path) - 1):
+        headingIn = math.atan2(path[i][1] - path[i - 1][1], path[i][0] - path[i - 1][0])
+        headingOut = math.atan2(path[i + 1][1] - path[i][1], path[i + 1][0] - path[i][0])
+        turn = abs(headingOut - headingIn) % (2 * math.pi)
+        angles.append(math.degrees(min(turn, 2 * math.pi - turn)))
+    return angles
+
+
+def roundCorners(path, checker, maxTurnAngle, arcSpacing):
+    """
+    Replaces the corners by circle arcs the snake can follow. The arcs are sampled with waypoints at most arcSpacing
+    apart, and the heading changes by at most maxTurnAngle at every waypoint on them. That gives the arcs the radius
+    arcSpacing / (2 sin(maxTurnAngle / 2)), the tightest turn allowed. A corner is kept as it is if its arc does not
+    fit on the segments next to it, half of a segment between two corners is left for each of them, or if the arc
+    collides.
+
+    :param path: list of [x, y]
+    :param checker: collision checker with checkSegments
+    :param maxTurnAngle: largest change of heading at a waypoint on the arcs, in degrees
+    :param arcSpacing: largest distance between the waypoints on the arcs
+    :return: the path with rounded corners, with the same first and last point
+    """
+    if len(path) < 3 or maxTurnAngle <= 0 or arcSpacing <= 0:
+        return [list(p) for p in path]
+
+    maxTurn = math.radians(min(maxTurnAngle, 180.0))
+    radius = arcSpacing / (2 * math.sin(maxTurn / 2))
+    rounded = [list(path[0])]
+    for i in range(1, len(path) - 1):
+        (x0, y0), (x1, y1), (x2, y2) = path[i - 1], path[i], path[i + 1]
+        lengthIn = math.hypot(x1 - x0, y1 - y0)
+        lengthOut = math.hypot(x2 - x1, y2 - y1)
+        turn = turnAngles([path[i - 1], path[i], path[i + 1]])[0]
+        if lengthIn == 0 or lengthOut == 0 or math.radians(turn) <= maxTurn:
+            rounded.append(list(path[i]))
+            continue
+
+        turn = math.radians(turn)
+        tangent = radius * math.tan(turn / 2)
+        roomIn = lengthIn if i == 1 else lengthIn / 2
+        roomOut = lengthOut if i == len(path) - 2 else lengthOut / 2
+        if tangent > roomIn or tangent > roomOut:
+            rounded.append(list(path[i]))
+            continue
+
+        # The arc starts and ends where it touches the segments, tangent away from the corner
+        headingIn = math.atan2(y1 - y0, x1 - x0)
+        side = 1 if (x1 - x0) * (y2 - y1) - (y1 - y0) * (x2 - x1) > 0 else -1
+        startX = x1 - tangent * math.cos(headingIn)
+        startY = y1 - tangent * math.sin(headingIn)
+        steps = math.ceil(turn / maxTurn)
+        chord = 2 * radius * math.sin(turn / steps / 2)
+        arc = [[startX, startY]]
+        for k in range(steps):
+            heading = headingIn + side * (k + 0.5) * turn / steps
+            arc.append([arc[-1][0] + chord * math.cos(heading), arc[-1][1] + chord * math.sin(heading)])
+
+        segments = [arc[k] + arc[k + 1] for k in range(steps)]
+        segments += [rounded[-1] + arc[0], arc[-1] + list(path[i + 1])]
+        if checker.checkSegments(segments).all():
+            rounded.extend(arc)
+        else:
+            rounded.append(list(path[i]))
+    rounded.append(list(path[-1]))
+    return rounded
+
+
+def resamplePath(path, spacing):
+    """
+    Places waypoints with a fixed distance between them along the path. The first and last point are kept.
+
+    :param path: list of [x, y]
+    :param spacing: distance between the waypoints
+    :return: the resampled path
+    """
+    if len(path) < 2 or spacing <= 0:
+        return [list(p) for p in path]
+
+    resampled = [list(path[0])]
+    # Distance left to walk before the next waypoint
+    remaining = spacing
+    for i in range(len(path) - 1):
+        (x1, y1), (x2, y2) = path[i], path[i + 1]
+        length = math.hypot(x2 - x1, y2 - y1)
+        walked = 0.0
+        while length - walked >= remaining:
+            walked += remaining
+            t = walked / length
+            resampled.append([x1 + (x2 - x1) * t, y1 + (y2 - y1) * t])
+            remaining = spacing
+        remaining -= length - walked
+
+    # A waypoint very close to the end is moved to the end instead of adding one more
+    lastGap = math.hypot(resampled[-1][0] - path[-1][0], resampled[-1][1] - path[-1][1])
+    if len(resampled) > 1 and lastGap < spacing / 2:
+        resampled[-1] = list(path[-1])
+    else:
+        resampled.append(list(path[-1]))
+    return resampled
+
+
+def optimizePath(path, checker, maxTurnAngle=None, arcSpacing=50.0, spacing=None):
+    """
+    Shortcuts the path, then rounds the corners and resamples it if asked for and if that does not make it collide
+
+    :param path: list of [x, y], as returned from the planners
+    :param checker: collision checker with checkSegments
+    :param maxTurnAngle: largest change of heading at a waypoint on the rounded corners in degrees, None to keep the
+        corners sharp. See roundCorners
+    :param arcSpacing: largest distance between the waypoints on the rounded corners
+    :param spacing: distance between the waypoints of the result, None to not resample. The resampled path is only
+        used if it does not turn more at a waypoint than the path before it
+    :return: the optimized path, None if path is None
+    """
+    if path is None:
+        return None
+
+    optimized = shortcutPath(path, checker)
+    if maxTurnAngle is not None:
+        optimized = roundCorners(optimized, checker, maxTurnAngle, arcSpacing)
+    if spacing is not None:
+        resampled = resamplePath(optimized, spacing)
+        if pathIsFree(resampled, checker) and max(turnAngles(resampled), default=0.0) <= \
+                max(turnAngles(optimized), default=0.0) + 1e-6:
+            optimized = resampled
+    return optimized
@@ -0,0 +1,156 @@
+"""
+Counters and timers for the parts of the planners that run every iteration. Profiling is opt-in: a disabled
+PlannerStats hands out a timer that does nothing, so the planners can be timed without changing the code that runs
+when they are not.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import time
+from Python.logger import Logger
+
+
+class _Timer:
+    """
+    Context manager that adds the time spent inside it to one entry of a PlannerStats.
+    """
+    __slots__ = ("stats", "name", "n", "startTime")
+
+    def __init__(self, stats, name, n):
+        self.stats = stats
+        self.name = name
+        self.n = n
+        self.startTime = 0.0
+
+    def __enter__(self):
+        self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.add(self.name, time.perf_counter() - self.startTime, self.n)
+        return False
+
+
+class _NoTimer:
+    """
+    Context manager that does nothing, handed out when profiling is off.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_noTimer = _NoTimer()
+
+
+class PlannerStats:
+    """
+    Number of calls and time spent for each named part of a planner. The timers are inclusive, so a part that calls
+    another part, like rewire calling the collision checks, also counts the time of the inner part.
+    """
+
+    def __init__(self, enabled=True):
+        """
+
+        :param enabled: False to make timer and count do nothing
+        """
+        self.enabled = enabled
+        self.counts = {}
+        self.times = {}
+
+    def timer(self, name, n=1):
+        """
+        Times a block of code with a with-statement
+
+        :param name: name of the part of the planner
+        :param n: number to add to the count, e.g. the number of edges in a batch of collision checks
+        :return: context manager
+        """
+        if not self.enabled:
+            return _noTimer
+        return _Timer(self, name, n)
+
+    def count(self, name, n=1):
+        """
+        Counts something without timing it
+
+        :param name: name of the counter
+        :param n: number to add
+        :return: None
+        """
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def add(self, name, seconds, n=1):
+        """
+        Adds time and a count to a part
+
+        :param name: name of the part of the planner
+        :param seconds: time spent
+        :param n: number to add to the count
+        :return: None
+        """
+        self.counts[name] = self.counts.get(name, 0) + n
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        """
+        Adds the counts and times of another PlannerStats to this one
+
+        :param other: PlannerStats or its asDict() to add, None is ignored
+        :return: None
+        """
+        if other is None:
+            return
+        if isinstance(other, PlannerStats):
+            other = other.asDict()
+        for name, entry in other.items():
+            self.counts[name] = self.counts.get(name, 0) + entry["count"]
+            if entry["time"] is not None:
+                self.times[name] = self.times.get(name, 0.0) + entry["time"]
+
+    def reset(self):
+        """
+        Sets every counter and timer to zero
+
+        :return: None
+        """
+        self.counts = {}
+        self.times = {}
+
+    def asDict(self):
+        """
+        Gets the statistics as plain data
+
+        :return: dict from name to a dict with count and time (None for counters that are not timed)
+        """
+        return {name: {"count": n, "time": self.times.get(name)} for name, n in self.counts.items()}
+
+    def report(self):
+        """
+        Formats the statistics, the slowest part first
+
+        :return: one line per part
+        """
+        names = sorted(self.counts, key=lambda name: self.times.get(name, -1.0), reverse=True)
+        lines = []
+        for name in names:
+            if name in self.times:
+                lines.append(f"{name}: {self.counts[name]} calls, {self.times[name] * 1000:.1f} ms")
+            else:
+                lines.append(f"{name}: {self.counts[name]}")
+        return "\n".join(lines)
+
+    def logg(self, title):
+        """
+        Writes the statistics to the log, if profiling is on
+
+        :param title: what was profiled
+        :return: None
+        """
+        if self.enabled and self.counts:
+            Logger.logg(f"{title} profile: " + ", ".join(self.report().split("\n")), Logger.debug)
@@ -0,0 +1,73 @@
+"""
+Progress reports from the planners. Printing every iteration slows the planning down, so the planners hand their
+progress to a ProgressReporter that passes at most a few reports per second on to a callback or a queue.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import queue
+import time
+
+
+class ProgressReporter:
+    """
+    Rate limited channel for progress events. An event is a dict with planner, iteration, nodes and best_cost
+    (None while no path is found).
+    """
+
+    def __init__(self, callback=None, eventQueue=None, maxRate=5.0):
+        """
+
+        :param callback: function that is called with every event
+        :param eventQueue: queue.Queue or multiprocessing queue every event is put in, events are dropped if it is full
+        :param maxRate: max number of events per second
+        """
+        self.callback = callback
+        self.eventQueue = eventQueue
+        self.interval = 1.0 / maxRate
+        self.lastReport = float("-inf")
+
+    def due(self):
+        """
+        Checks if enough time has passed since the last event to send a new one. The planners call this before
+        they collect the numbers for an event, so the numbers are only collected when they are sent.
+
+        :return: True if report would send an event now
+        """
+        return time.perf_counter() - self.lastReport >= self.interval
+
+    def report(self, planner, iteration, nodes, bestCost, force=False):
+        """
+        Sends an event, unless the last one was sent too recently
+
+        :param planner: name of the planner
+        :param iteration: number of iterations done
+        :param nodes: number of nodes in the tree
+        :param bestCost: cost of the best path found, None if no path is found yet
+        :param force: send the event even if the last one was sent too recently, used for the last event of a plan
+        :return: True if the event was sent
+        """
+        if not force and not self.due():
+            return False
+        self.lastReport = time.perf_counter()
+
+        event = {"planner": planner, "iteration": iteration, "nodes": nodes, "best_cost": bestCost}
+        if self.callback is not None:
+            self.callback(event)
+        if self.eventQueue is not None:
+            try:
+                self.eventQueue.put_nowait(event)
+            except queue.Full:
+                pass
+        return True
+
+    @staticmethod
+    def describe(event):
+        """
+        Formats an event for the log
+
+        :param event: event from report
+        :return: the event as text
+        """
+        bestCost = "no path yet" if event["best_cost"] is None else f"best cost {event['best_cost']:.0f}"
+        return f"{event['planner']}: iteration {event['iteration']}, {event['nodes']} nodes, {bestCost}"
@@ -6,9 +6,14 @@ author: Atsushi Sakai(@Atsushi_twi)
 
 import math
 import random
-from shapely.geometry import LineString
-from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
-import matplotlib.pyplot as plt
+import time
+from Python.Pathfinding.spatialIndex import createNodeIndex
+from Python.Pathfinding.collisionChecker import CollisionChecker
+from Python.Pathfinding.nodeStore import NodeStore, NO_PARENT
+from Python.Pathfinding.plannerStats import PlannerStats
+
+# matplotlib and shapely are slow to import and only needed for drawing and the "shapely" collision engine,
+# so they are imported where they are used
 
 show_animation = False
 show_final_animation = True
@@ -16,15 +21,18 @@ show_final_animation = True
 
 class RRT:
     class Node:
+        # The parent and cost of a node are only kept in the node store, under index
+        __slots__ = ("x", "y", "index")
+
         def __init__(self, x, y):
             self.x = x
             self.y = y
-            self.path_x = []
-            self.path_y = []
-            self.parent = None
+            self.index = None
 
     def __init__(self, start, goal, rand_area_x, rand_area_y, lineList, edge_dist, expand_dis=0.5,
-                 path_resolution=0.1, goal_sample_rate=5, max_iter=7000):
+                 path_resolution=0.1, goal_sample_rate=5, max_iter=7000, node_index="grid",
+                 collision_engine="vectorized", clearance_map=None, seed=None, rng=None, profile=False,
+                 progress=None):
         """
 
         :param start: Start point coordinates
@@ -37,6 +45,15 @@ class RRT:
         :param path_resolution: not in use
         :param goal_sample_rate: chance for it to try to just go to goal
         :param max_iter: max iterations
+        :param node_index: spatial index used for nearest node searches, "grid", "list" or "array" to search the
+            arrays of the node store
+        :param collision_engine: "vectorized" to use the numpy CollisionChecker, "shapely" for checkObstacle,
+            "clearance" to look up distances in clearance_map
+        :param clearance_map: ClearanceMap of the maze, needed for the "clearance" collision engine
+        :param seed: seed for the random node generator, None for a random seed
+        :param rng: random.Random to draw the nodes from instead of making one from seed
+        :param profile: count and time the parts of every iteration, see PlannerStats
+        :param progress: ProgressReporter to send the progress of the planning to
         """
         self.start = self.Node(start[0], start[1])
         self.end = self.Node(goal[0], goal[1])
@@ -49,38 +66,193 @@ class RRT:
         self.goal_sample_rate = goal_sample_rate
         self.max_iter = max_iter
         self.node_list = []
+        self.node_index = node_index
+        self.nodeIndex = None
+        self.nodeStore = None
         self.lineList = lineList
         self.edge_dist = edge_dist
-
-    def planning(self, animation=False):
+        self.collision_engine = collision_engine
+        self.clearance_map = clearance_map
+        self.collisionChecker = None
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.iterations = 0
+        self.collisionChecks = 0
+        self.profiler = PlannerStats(enabled=profile)
+        self.progress = progress
+        # Why the last planning stopped: "found", "max_iter" or "deadline"
+        self.status = None
+
+    def planning(self, animation=False, deadline=None):
         """
         Finds a path through a maze.
         :param animation: flag for animation on or off
+        :param deadline: time.monotonic() to give up at, None to only stop at max_iter. The reason planning stopped
+            is saved in status
         """
-        self.node_list = [self.start]
+        self.initTree()
+        self.prepareCollisionChecker()
         for i in range(self.max_iter):
-            rnd_node = self.getRandomNode()
-            nearest_ind = self.getNearestNodeIndex(self.node_list, rnd_node)
+            if self.deadlinePassed(deadline):
+                return self.finishPlanning(None, "deadline")
+            self.iterations = i + 1
+            with self.profiler.timer("sample"):
+                rnd_node = self.getRandomNode()
+            with self.profiler.timer("nearest"):
+                nearest_ind = self.nodeIndex.nearest(rnd_node.x, rnd_node.y)
             nearest_node = self.node_list[nearest_ind]
 
-            new_node = self.steer(nearest_node, rnd_node, self.expand_dis)
+            with self.profiler.timer("steer"):
+                new_x, new_y = self.steerPoint(nearest_node, rnd_node, self.expand_dis)
 
-            if self.checkObstacle(new_node, self.lineList, self.edge_dist):
-                self.node_list.append(new_node)
+            if self.edgeCollisionFree(nearest_node, new_x, new_y):
+                self.addNode(self.Node(new_x, new_y), nearest_ind)
 
             if animation and i % 5 == 0:
                 self.drawGraph(rnd_node)
 
-            if self.calculateDistanceToGoal(self.node_list[-1].x, self.node_list[-1].y) <= self.expand_dis:
-                final_node = self.steer(self.node_list[-1], self.end, self.expand_dis)
-                if self.checkObstacle(final_node, self.lineList, self.edge_dist):
-                    return self.generateFinalCourse(len(self.node_list) - 1)
+            with self.profiler.timer("goal_search"):
+                reached_goal = False
+                last_node = self.node_list[-1]
+                if self.calculateDistanceToGoal(last_node.x, last_node.y) <= self.expand_dis:
+                    final_x, final_y = self.steerPoint(last_node, self.end, self.expand_dis)
+                    reached_goal = self.edgeCollisionFree(last_node, final_x, final_y)
+            if reached_goal:
+                return self.finishPlanning(self.generateFinalCourse(len(self.node_list) - 1), "found")
 
             if animation and i % 5:
                 self.drawGraph(rnd_node)
 
+            self.reportProgress()
+
+        return self.finishPlanning(None, "max_iter")
+
+    @staticmethod
+    def deadlinePassed(deadline):
+        """
+        Checks if the time to plan is up
+
+        :param deadline: time.monotonic() to stop at, None for no deadline
+        :return: True if the deadline has passed
+        """
+        return deadline is not None and time.monotonic() >= deadline
+
+    def finishPlanning(self, path, status):
+        """
+        Saves why the planning stopped, logs the profile of the planning run if profiling is on, and sends the last
+        progress report.
+
+        :param path: the path the planning found, None if no path
+        :param status: "found" if a path was found in time, "max_iter" if no path was found in max_iter iterations,
+            "deadline" if the deadline passed first
+        :return: the path
+        """
+        self.status = status
+        self.profiler.logg(type(self).__name__)
+        self.reportProgress(force=True, bestCost=None if path is None else self.pathLength(path))
+        return path
+
+    def reportProgress(self, force=False, bestCost=None):
+        """
+        Sends the progress to the progress reporter, if there is one and it is time for a new report.
+
+        :param force: send the report even if the last one was sent too recently
+        :param bestCost: cost of the best path, None to get it from bestCost
+        :return: None
+        """
+        if self.progress is not None and (force or self.progress.due()):
+            if bestCost is None:
+                bestCost = self.bestCost()
+            self.progress.report(type(self).__name__, self.iterations, len(self.node_list), bestCost, force)
+
+    def bestCost(self):
+        """
+        Gets the cost of the best path to the goal in the tree. RRT stops at the first path, so there is never one
+        while it is planning.
+
+        :return: None
+        """
         return None
 
+    def initTree(self, root=None):
+        """
+        Empties the tree, the node store and the spatial index, then adds the start node.
+
+        :param root: node to start the tree in, None for the start node
+        :return: None
+        """
+        self.node_list = []
+        self.collisionChecks = 0
+        self.profiler.reset()
+        self.nodeStore = NodeStore()
+        if self.node_index == "array":
+            self.nodeIndex = self.nodeStore
+        else:
+            self.nodeIndex = createNodeIndex(self.node_index, self.expand_dis)
+        self.addNode(self.start if root is None else root)
+
+    def addNode(self, node, parent=NO_PARENT, cost=0.0):
+        """
+        Adds a node to the tree, the node store and the spatial index.
+
+        :param node: node to add
+        :param parent: index of the parent node, NO_PARENT for the root
+        :param cost: cost of the path from the root to the node
+        :return: index of the node in node_list
+        """
+        node.index = self.nodeStore.add(node.x, node.y, parent, cost)
+        self.node_list.append(node)
+        if self.nodeIndex is not self.nodeStore:
+            self.nodeIndex.insert(node.x, node.y)
+        return node.index
+
+    def prepareCollisionChecker(self):
+        """
+        Converts the current lineList for the collision engine. Called at the start of planning, so lineList can be
+        changed between runs.
+
+        :return: None
+        """
+        if self.collision_engine == "vectorized":
+            self.collisionChecker = CollisionChecker(self.lineList, self.edge_dist)
+        elif self.collision_engine == "clearance":
+            if self.clearance_map is None:
+                raise ValueError("The clearance collision engine needs a clearance_map")
+            self.collisionChecker = self.clearance_map.checker(self.edge_dist)
+        elif self.collision_engine == "shapely":
+            self.collisionChecker = None
+        else:
+            raise ValueError(f"Unknown collision engine: {self.collision_engine}")
+
+    def edgeCollisionFree(self, from_node, x, y):
+        """
+        Checks the straight edge from a node to a set of coordinates, without making a node for it.
+
+        :param from_node: node in the start of the edge
+        :param x: x coordinate of the end of the edge
+        :param y: y coordinate of the end of the edge
+        :return: True if no collision, false if collision
+        """
+        self.collisionChecks += 1
+        with self.profiler.timer("collision"):
+            if self.collisionChecker is None:
+                return self.checkObstacle([from_node.x, from_node.y, x, y], self.lineList, self.edge_dist)
+            return self.collisionChecker.checkSegment(from_node.x, from_node.y, x, y)
+
+    def edgesCollisionFree(self, node, inds):
+        """
+        Checks the straight edges between a node and several nodes in the tree in one batch.
+
+        :param node: node in one end of the edges
+        :param inds: indexes of the nodes in the other end of the edges
+        :return: list of booleans, True if no collision, false if collision
+        """
+        self.collisionChecks += len(inds)
+        with self.profiler.timer("collision", len(inds)):
+            segments = [[self.node_list[i].x, self.node_list[i].y, node.x, node.y] for i in inds]
+            if self.collisionChecker is None:
+                return [self.checkObstacle(segment, self.lineList, self.edge_dist) for segment in segments]
+            return list(self.collisionChecker.checkSegments(segments))
+
     def steer(self, from_node, to_node, extend_length=float("inf")):
         """
         Steers a node to a new node.
@@ -90,23 +262,24 @@ class RRT:
         :param extend_length: the expand distance
         :return: new node with run coordinates
         """
-        new_node = self.Node(from_node.x, from_node.y)
-        d, theta = self.calculateDistanceAndAngle(new_node, to_node)
+        x, y = self.steerPoint(from_node, to_node, extend_length)
+        return self.Node(x, y)
 
-        new_node.path_x = [new_node.x]
-        new_node.path_y = [new_node.y]
+    def steerPoint(self, from_node, to_node, extend_length=float("inf")):
+        """
+        Calculates where a node steered from from_node towards to_node ends up, without making the node.
+
+        :param from_node: the node to go from
+        :param to_node: the node to go to
+        :param extend_length: the expand distance
+        :return: x and y of the new node
+        """
+        d, theta = self.calculateDistanceAndAngle(from_node, to_node)
 
         if extend_length > d:
             extend_length = d
 
-        new_node.x += extend_length * math.cos(theta)
-        new_node.y += extend_length * math.sin(theta)
-        new_node.path_x.append(new_node.x)
-        new_node.path_y.append(new_node.y)
-
-        new_node.parent = from_node
-
-        return new_node
+        return from_node.x + extend_length * math.cos(theta), from_node.y + extend_length * math.sin(theta)
 
     def drawGraph(self, rnd=None):
         """
@@ -116,12 +289,13 @@ class RRT:
         :param rnd: the node to plot
         :return: Nothing
         """
+        import matplotlib.pyplot as plt
+
         plt.clf()
         if rnd is not None:
             plt.plot(rnd.x, rnd.y, "^k")
-        for node in self.node_list:
-            if node.parent:
-                plt.plot(node.path_x, node.path_y, "-g")
+        for x1, y1, x2, y2 in self.nodeStore.edges():
+            plt.plot([x1, x2], [y1, y2], "-g")
 
         for (data) in self.lineList:
             x1 = data[0][0]
@@ -137,6 +311,44 @@ class RRT:
         plt.grid(False)
         plt.pause(0.01)
 
+    def getTreeEdges(self):
+        """
+        Gets every edge in the tree, from parent to child.
+
+        :return: numpy array of shape (n, 4) with x1, y1, x2, y2 for every edge
+        """
+        return self.nodeStore.edges()
+
+    def treeStats(self, path, planningTime):
+        """
+        Collects statistics about the last planning run.
+
+        :param path: the path the planning returned
+        :param planningTime: how long the planning took in seconds
+        :return: dict with iterations, nodes, collision_checks, path_length (None if no path), planning_time and
+            status, and a copy of the PlannerStats as profile (see PlannerStats.asDict) if profiling is on
+        """
+        stats = {"iterations": self.iterations,
+                 "nodes": len(self.node_list),
+                 "collision_checks": self.collisionChecks,
+                 "path_length": None if path is None else self.pathLength(path),
+                 "planning_time": planningTime,
+                 "status": self.status}
+        if self.profiler.enabled:
+            stats["profile"] = self.profiler.asDict()
+        return stats
+
+    @staticmethod
+    def pathLength(path):
+        """
+        Calculates the length of a path
+
+        :param path: list of [x, y]
+        :return: length of the path
+        """
+        return sum(math.sqrt((path[i + 1][0] - path[i][0]) ** 2 + (path[i + 1][1] - path[i][1]) ** 2)
+                   for i in range(len(path) - 1))
+
     def generateFinalCourse(self, goal_ind):
         """
         Generates the final course if the goal is found.
@@ -145,11 +357,7 @@ class RRT:
         :return: the final path from start to goal
         """
         path = [[self.end.x, self.end.y]]
-        node = self.node_list[goal_ind]
-        while node.parent is not None:
-            path.append([node.x, node.y])
-            node = node.parent
-        path.append([node.x, node.y])
+        path.extend(self.nodeStore.pathTo(goal_ind))
 
         return path
 
@@ -171,9 +379,9 @@ class RRT:
 
         :return: new randomly placed node
         """
-        if random.randint(0, 100) > self.goal_sample_rate:
-            rnd = self.Node(random.uniform(self.min_rand_x, self.max_rand_x),
-                            random.uniform(self.min_rand_y, self.max_rand_y))
+        if self.rng.randint(0, 100) > self.goal_sample_rate:
+            rnd = self.Node(self.rng.uniform(self.min_rand_x, self.max_rand_x),
+                            self.rng.uniform(self.min_rand_y, self.max_rand_y))
         else:
             rnd = self.Node(self.end.x, self.end.y)
         return rnd
@@ -189,23 +397,25 @@ class RRT:
         :param y2: y2 coordinate for obstacle
         :return:
         """
+        import matplotlib.pyplot as plt
+
         plt.plot([x1, x2], [y1, y2], color='k', linestyle='-', linewidth=1)
 
     @staticmethod
-    def checkObstacle(node, lineList, edgeDistance):
+    def checkObstacle(edge, lineList, edgeDistance):
         """
-        Checks if the nodes path collides with obstacle. \n
+        Checks if an edge collides with obstacle. \n
         Also checks how close to the obstacle the line \n
         will go.
 
-        :param node: Node to check collision for
+        :param edge: x1, y1, x2, y2 of the edge to check collision for
         :param lineList: List of lines for obstacles
         :param edgeDistance: Distance to keep from the obstacles
         :return: True if no collision, false if collision
         """
-        dx_list = [x for x in node.path_x]
-        dy_list = [y for y in node.path_y]
-        node_line = LineString([(x, y) for (x, y) in zip(dx_list, dy_list)])
+        from shapely.geometry import LineString
+
+        node_line = LineString([(edge[0], edge[1]), (edge[2], edge[3])])
         for data in lineList:
             x1 = data[0][0]
             y1 = data[0][1]
@@ -250,6 +460,9 @@ class RRT:
 
 
 def main():
+    import matplotlib.pyplot as plt
+    from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
+
     m = mazeRecognizer()
     lines, _ = m.findMaze()
     rrt = RRT(start=[810, 385], goal=[1250, 150], rand_area_x=[250, 1500], rand_area_y=[0, 1100],
@@ -0,0 +1,237 @@
+"""
+RRT-Connect, a bidirectional RRT. One tree grows from the start and one from the goal. Every new node in one tree
+is followed by a greedy attempt to connect the other tree to it, which finds a first path through narrow corridors
+much faster than growing a single tree towards the goal.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import time
+import numpy as np
+from Python.logger import Logger
+from Python.Pathfinding.rrt import RRT
+
+
+class RRTConnect(RRT):
+    """
+    Class for RRT-Connect planning. Takes the same arguments as RRT and returns the path in the same format.
+    """
+
+    def __init__(self, start, goal, rand_area_x, rand_area_y, lineList, edge_dist, expand_dis=0.5,
+                 path_resolution=0.1, goal_sample_rate=5, max_iter=7000, node_index="grid",
+                 collision_engine="vectorized", clearance_map=None, seed=None, rng=None, profile=False,
+                 progress=None):
+        """
+
+        :param start: Start point coordinates
+        :param goal: Goal point coordinates
+        :param rand_area_x: Area in x-plane which the nodes can be randomly be placed
+        :param rand_area_y: Area in y-plane which the nodes can be randomly place
+        :param lineList: list of lines for obstacle-lines
+        :param edge_dist: distance for rrt to keep from the obstacles
+        :param expand_dis: expand distance
+        :param path_resolution: not in use
+        :param goal_sample_rate: chance for it to try to just go to goal
+        :param max_iter: max iterations
+        :param node_index: spatial index used for nearest node searches, "grid", "list" or "array"
+        :param collision_engine: "vectorized", "shapely" or "clearance", see RRT
+        :param clearance_map: ClearanceMap of the maze, needed for the "clearance" collision engine
+        :param seed: seed for the random node generator, None for a random seed
+        :param rng: random.Random to draw the nodes from instead of making one from seed
+        :param profile: count the collision checks and time them, see PlannerStats
+        :param progress: ProgressReporter to send the progress of the planning to
+        """
+        super().__init__(start, goal, rand_area_x, rand_area_y, lineList, edge_dist, expand_dis, path_resolution,
+                         goal_sample_rate, max_iter, node_index, collision_engine, clearance_map, seed, rng, profile,
+                         progress)
+        # The tree that is not being grown: (node_list, nodeStore, nodeIndex)
+        self.otherTree = None
+        self.startTreeActive = True
+
+    def initTree(self, root=None):
+        """
+        Empties both trees, then adds the goal node to the goal tree and the start node to the start tree. The start
+        tree is the active one afterwards.
+
+        :param root: not in use, the trees always start in the start and the goal
+        :return: None
+        """
+        super().initTree(self.end)
+        self.otherTree = (self.node_list, self.nodeStore, self.nodeIndex)
+        super().initTree(self.start)
+        self.startTreeActive = True
+
+    def swapTrees(self):
+        """
+        Makes the other tree the active one, so addNode and the node index work on it.
+
+        :return: None
+        """
+        activeTree = (self.node_list, self.nodeStore, self.nodeIndex)
+        self.node_list, self.nodeStore, self.nodeIndex = self.otherTree
+        self.otherTree = activeTree
+        self.startTreeActive = not self.startTreeActive
+
+    def planning(self, animation=False, deadline=None):
+        """
+        Finds a path through a maze.
+
+        :param animation: flag for animation on or off
+        :param deadline: time.monotonic() to give up at, None to only stop at max_iter
+        :return: the path from goal to start, None if no path was found
+        """
+        self.initTree()
+        self.prepareCollisionChecker()
+        for i in range(self.max_iter):
+            if self.deadlinePassed(deadline):
+                return self.finishPlanning(None, "deadline")
+            self.iterations = i + 1
+            rnd_node = self.getRandomNode()
+            new_node = self.extend(rnd_node)
+
+            if new_node is not None:
+                self.swapTrees()
+                connect_node = self.connect(new_node)
+                if connect_node is not None:
+                    return self.finishPlanning(self.joinTrees(connect_node, new_node), "found")
+            else:
+                self.swapTrees()
+
+            if animation and i % 5 == 0:
+                self.drawGraph(rnd_node)
+
+            self.reportProgress()
+
+        return self.finishPlanning(None, "max_iter")
+
+    def extend(self, to_node):
+        """
+        Grows the active tree one step from its nearest node towards a node.
+
+        :param to_node: the node to grow towards
+        :return: the new node, None if the step collides
+        """
+        nearest_ind = self.nodeIndex.nearest(to_node.x, to_node.y)
+        nearest_node = self.node_list[nearest_ind]
+        new_x, new_y = self.steerPoint(nearest_node, to_node, self.expand_dis)
+        if not self.edgeCollisionFree(nearest_node, new_x, new_y):
+            return None
+
+        new_node = self.Node(new_x, new_y)
+        self.addNode(new_node, nearest_ind)
+        return new_node
+
+    def connect(self, to_node):
+        """
+        Greedily grows the active tree towards a node until it reaches it or is blocked.
+
+        :param to_node: the node to connect to, in the other tree
+        :return: the node in the active tree at the same place as to_node, None if it was blocked
+        """
+        from_node = self.node_list[self.nodeIndex.nearest(to_node.x, to_node.y)]
+        while True:
+            d, _ = self.calculateDistanceAndAngle(from_node, to_node)
+            new_x, new_y = self.steerPoint(from_node, to_node, self.expand_dis)
+            if not self.edgeCollisionFree(from_node, new_x, new_y):
+                return None
+
+            new_node = self.Node(new_x, new_y)
+            self.addNode(new_node, from_node.index)
+            if d <= self.expand_dis:
+                return new_node
+            from_node = new_node
+
+    def joinTrees(self, active_node, other_node):
+        """
+        Puts together the path through the node where the two trees meet.
+
+        :param active_node: the meeting node in the active tree
+        :param other_node: the meeting node in the other tree
+        :return: the path from goal to start, same order as RRT.generateFinalCourse
+        """
+        activePath = self.nodeStore.pathTo(active_node.index)
+        otherPath = self.otherTree[1].pathTo(other_node.index)
+        if self.startTreeActive:
+            startPath, goalPath = activePath, otherPath
+        else:
+            startPath, goalPath = otherPath, activePath
+
+        # goalPath ends in the goal and startPath in the start, both begin in the meeting point
+        return goalPath[::-1] + startPath[1:]
+
+    def getTreeEdges(self):
+        """
+        Gets every edge in both trees, from parent to child.
+
+        :return: numpy array of shape (n, 4) with x1, y1, x2, y2 for every edge
+        """
+        return np.vstack((self.nodeStore.edges(), self.otherTree[1].edges()))
+
+    def treeStats(self, path, planningTime):
+        """
+        Collects statistics about the last planning run, counting the nodes in both trees.
+
+        :param path: the path the planning returned
+        :param planningTime: how long the planning took in seconds
+        :return: dict with iterations, nodes, collision_checks, path_length (None if no path) and planning_time
+        """
+        stats = super().treeStats(path, planningTime)
+        stats["nodes"] += len(self.otherTree[0])
+        return stats
+
+    def runHeadless(self, finishLoops=False, deadline=None):
+        """
+        Runs the planner without drawing anything, same as RRTStar.runHeadless.
+
+        :param finishLoops: not in use, RRT-Connect stops at the first path
+        :param deadline: time.monotonic() to give up at, None to only stop at max_iter
+        :return: the path (None if no path was found) and a dict of statistics about the trees
+        """
+        Logger.logg("Running RRT-Connect", Logger.info)
+        startTime = time.time()
+        path = self.planning(animation=False, deadline=deadline)
+        stats = self.treeStats(path, time.time() - startTime)
+
+        if path is None:
+            Logger.logg("RRT-Connect cannot find path", Logger.info)
+        return path, stats
+
+    def drawGraph(self, rnd=None):
+        """
+        Plots both trees, if there is a node sent in, \n
+        it will plot this nodes placement.
+
+        :param rnd: the node to plot
+        :return: Nothing
+        """
+        import matplotlib.pyplot as plt
+
+        super().drawGraph(rnd)
+        for x1, y1, x2, y2 in self.otherTree[1].edges():
+            plt.plot([x1, x2], [y1, y2], "-b")
+        plt.pause(0.01)
+
+
+def main():
+    import matplotlib.pyplot as plt
+    from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
+
+    m = mazeRecognizer()
+    lines, _ = m.findMaze()
+    rrtConnect = RRTConnect(start=[810, 385], goal=[1250, 150], rand_area_x=[250, 1500], rand_area_y=[0, 1100],
+                            lineList=lines, expand_dis=50.0, path_resolution=25.0, max_iter=1000,
+                            goal_sample_rate=20, edge_dist=30)
+
+    path = rrtConnect.planning()
+
+    if path is None:
+        print("Cannot find path")
+    else:
+        print("found path!!")
+        rrtConnect.drawGraph()
+        plt.plot([x for (x, y) in path], [y for (x, y) in path], '-r')
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,22 +7,23 @@ author: Atsushi Sakai(@Atsushi_twi)
 
 import math
 import os
+import random
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 from Python.logger import Logger
-import matplotlib.pyplot as plt
+from Python.Pathfinding.plannerStats import PlannerStats
+from Python.Pathfinding.tourPlanner import solveOpenTour
 import numpy as np
-from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
-from Python.ImageProcessing.deadEndDetector import DeadEndDetector
-from Python.ImageProcessing.draw import drawLines
-import cv2
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) +
                 "/../RRT/")
 
 try:
     from Python.Pathfinding.rrt import RRT
+    from Python.Pathfinding.nodeStore import NO_PARENT
 except ImportError:
     raise
 
@@ -35,17 +36,20 @@ class RRTStar(RRT):
     Class for RRT Star planning
     """
 
-    class Node(RRT.Node):
-        def __init__(self, x, y):
-            super().__init__(x, y)
-            self.cost = 0.0
-
     def __init__(self, start, goal, lineList, edge_dist, rand_area_x, rand_area_y,
                  expand_dis=3.0,
                  path_resolution=0.5,
                  goal_sample_rate=20,
                  max_iter=10000,
-                 connect_circle_dist=50.0
+                 connect_circle_dist=50.0,
+                 node_index="grid",
+                 collision_engine="vectorized",
+                 clearance_map=None,
+                 seed=None,
+                 informed=False,
+                 rng=None,
+                 profile=False,
+                 progress=None
                  ):
         """
 
@@ -60,54 +64,234 @@ class RRTStar(RRT):
         :param goal_sample_rate: chance for it to try to just go to goal
         :param max_iter: max iterations
         :param connect_circle_dist: size around for which it will search for nodes
+        :param node_index: spatial index used for nearest node searches, "grid" or "list"
+        :param collision_engine: "vectorized" to use the numpy CollisionChecker, "shapely" for checkObstacle,
+            "clearance" to look up distances in clearance_map
+        :param clearance_map: ClearanceMap of the maze, needed for the "clearance" collision engine
+        :param seed: seed for the random node generator, None for a random seed
+        :param informed: when a path is found, only sample inside the ellipse where shorter paths can be
+        :param rng: random.Random to draw the nodes from instead of making one from seed
+        :param profile: count and time the parts of every iteration, see PlannerStats
+        :param progress: ProgressReporter to send the progress of the planning to
         """
         super().__init__(start, goal,
                          rand_area_x, rand_area_y, lineList, edge_dist, expand_dis, path_resolution, goal_sample_rate,
-                         max_iter)
+                         max_iter, node_index, collision_engine, clearance_map, seed, rng, profile, progress)
 
         self.connect_circle_dist = connect_circle_dist
         self.goal_node = self.Node(goal[0], goal[1])
         self.showFinalAnimation = True
+        self.informed = informed
+        self.bestGoalCost = float("inf")
+        self.bestPathLength = float("inf")
+
+    def initTree(self, root=None):
+        """
+        Empties the tree and forgets the best path found.
 
-    def planning(self, animation=False, search_until_max_iter=False):
+        :param root: node to start the tree in, None for the start node
+        :return: None
+        """
+        # Indexes of the children of every node, the parents and costs are in the node store
+        self.children = []
+        # Indexes of the nodes within expand_dis of the goal whose edge to the goal has not been checked yet, the
+        # ones with a free edge, and the cheapest of those as (cost, index)
+        self.pendingGoals = []
+        self.safeGoals = set()
+        self.bestGoalIndex = None
+        self.bestGoalKey = None
+        # Best goal node and its cost the last time updateBestPath made its path
+        self.lastPathKey = None
+        super().initTree(root)
+        self.bestGoalCost = float("inf")
+        self.bestPathLength = float("inf")
+
+    def addNode(self, node, parent=NO_PARENT, cost=0.0):
+        """
+        Adds a node to the tree and to the spatial index, and to the child list of its parent. Nodes close enough to
+        the goal are remembered as goal candidates.
+
+        :param node: node to add
+        :param parent: index of the parent node, NO_PARENT for the root
+        :param cost: cost of the path from the root to the node
+        :return: index of the node in node_list
+        """
+        index = super().addNode(node, parent, cost)
+        self.children.append([])
+        if parent != NO_PARENT:
+            self.children[parent].append(index)
+        if self.calculateDistanceToGoal(node.x, node.y) <= self.expand_dis:
+            self.pendingGoals.append(index)
+        return index
+
+    def planning(self, animation=False, search_until_max_iter=False, deadline=None):
         """
         Finds a path through a maze
 
         :param animation: flag for animation on or off
         :param search_until_max_iter: search until max iteration for path improving or not
+        :param deadline: time.monotonic() to stop at, None to only stop at max_iter. If the deadline passes, the best
+            path found so far is returned. The reason planning stopped is saved in status
         """
 
-        self.node_list = [self.start]
+        self.initTree()
+        self.prepareCollisionChecker()
+        status = "max_iter"
         for i in range(self.max_iter):
-            print("Iter:", i, ", number of nodes:", len(self.node_list))
-            rnd = self.getRandomNode()
-            nearest_ind = self.getNearestNodeIndex(self.node_list, rnd)
-            new_node = self.steer(self.node_list[nearest_ind], rnd, self.expand_dis)
-
-            if self.checkObstacle(new_node, self.lineList, self.edge_dist):
-                near_inds = self.findNearNodes(new_node)
-                new_node = self.chooseParent(new_node, near_inds)
-                if new_node:
-                    self.node_list.append(new_node)
-                    self.rewire(new_node, near_inds)
-
-            if animation and i % 5 == 0:
-                self.drawGraph(rnd)
+            if self.deadlinePassed(deadline):
+                status = "deadline"
+                break
+            new_node = self.growTree(i, animation)
 
             if (not search_until_max_iter) and new_node:  # check reaching the goal
                 last_index = self.searchBestGoalNode()
-                if last_index:
+                if last_index is not None:
                     print("Iterations: ", i)
                     Logger.logg(f"RRT* found path, iterations: {i}", Logger.info)
-                    return self.generateFinalCourse(last_index)
+                    return self.finishPlanning(self.generateFinalCourse(last_index), "found")
+            elif self.informed and new_node:
+                self.updateBestPath()
 
-        print("reached max iteration")
+        if status == "max_iter":
+            print("reached max iteration")
+        else:
+            Logger.logg(f"RRT* reached the deadline, iterations: {self.iterations}", Logger.info)
 
         last_index = self.searchBestGoalNode()
-        if last_index:
-            return self.generateFinalCourse(last_index)
+        if last_index is None:
+            return self.finishPlanning(None, status)
+        # The deadline is kept as the status, so the caller knows the path may be improved by planning longer
+        if status == "max_iter":
+            status = "found"
+        return self.finishPlanning(self.generateFinalCourse(last_index), status)
+
+    def planningAnytime(self, animation=False, deadline=None):
+        """
+        Searches until max iteration, and yields the path every time a better one is found. The first path can be
+        used right away while the search keeps improving it.
+
+        :param animation: flag for animation on or off
+        :param deadline: time.monotonic() to stop at, None to only stop at max_iter
+        :return: generator of paths, each one shorter than the one before
+        """
+        self.initTree()
+        self.prepareCollisionChecker()
+        status = "max_iter"
+        for i in range(self.max_iter):
+            if self.deadlinePassed(deadline):
+                status = "deadline"
+                break
+            new_node = self.growTree(i, animation)
+
+            if new_node:
+                path = self.updateBestPath()
+                if path is not None:
+                    Logger.logg(f"RRT* improved path, iterations: {i}, length: {self.bestPathLength}", Logger.info)
+                    yield path
+        if self.bestGoalCost < float("inf") and status == "max_iter":
+            status = "found"
+        self.finishPlanning(None, status)
+
+    def growTree(self, i, animation=False):
+        """
+        Runs one iteration of RRT*: samples a node, connects it to the best parent and rewires around it.
+
+        :param i: number of the iteration
+        :param animation: flag for animation on or off
+        :return: the new node, None if no node was added
+        """
+        self.iterations = i + 1
+        with self.profiler.timer("sample"):
+            rnd = self.getRandomNode()
+        with self.profiler.timer("nearest"):
+            nearest_node = self.node_list[self.nodeIndex.nearest(rnd.x, rnd.y)]
+        with self.profiler.timer("steer"):
+            new_x, new_y = self.steerPoint(nearest_node, rnd, self.expand_dis)
+
+        new_node = None
+        # Only make a node for candidates that do not collide
+        if self.edgeCollisionFree(nearest_node, new_x, new_y):
+            new_node = self.Node(new_x, new_y)
+            with self.profiler.timer("near"):
+                near_inds = self.findNearNodes(new_node)
+            with self.profiler.timer("choose_parent"):
+                parent = self.chooseParent(new_node, near_inds)
+            if parent is None:
+                new_node = None
+            else:
+                self.addNode(new_node, *parent)
+                with self.profiler.timer("rewire"):
+                    self.rewire(new_node, near_inds)
+
+        if animation and i % 5 == 0:
+            self.drawGraph(rnd)
+
+        self.reportProgress()
+        return new_node
+
+    def updateBestPath(self):
+        """
+        Checks if the tree has a shorter way to the goal than the best one found so far. The length of the path is
+        compared, not the cost of the goal node, since the costs are rounded in chooseParent and include the extra
+        cost of leaving the start, so a cheaper node can have a longer path.
+
+        :return: the new best path, None if it did not get shorter
+        """
+        goal_index = self.searchBestGoalNode()
+        if goal_index is None:
+            return None
 
-        return None
+        # The path only changes when the best node or its cost does, rewiring always lowers the cost
+        path_key = (goal_index, self.nodeStore.cost[goal_index])
+        if path_key == self.lastPathKey:
+            return None
+        self.lastPathKey = path_key
+
+        path = self.generateFinalCourse(goal_index)
+        path_length = self.pathLength(path)
+        if path_length >= self.bestPathLength:
+            return None
+
+        goal_node = self.node_list[goal_index]
+        self.bestGoalCost = float(self.nodeStore.cost[goal_index]) + self.calculateDistanceToGoal(goal_node.x,
+                                                                                                    goal_node.y)
+        self.bestPathLength = path_length
+        return path
+
+    def getRandomNode(self):
+        """
+        Creates a node in a random place. In informed mode, once a path is found, the node is placed inside the
+        ellipse of points that could be on a shorter path.
+
+        :return: new randomly placed node
+        """
+        if not self.informed or self.bestPathLength == float("inf"):
+            return super().getRandomNode()
+
+        if self.rng.randint(0, 100) > self.goal_sample_rate:
+            return self.sampleEllipse(self.bestPathLength)
+        return self.Node(self.end.x, self.end.y)
+
+    def sampleEllipse(self, c_best):
+        """
+        Places a node uniformly inside the ellipse with start and goal as focal points, where the distance from one
+        focal point to the other through any point is at most c_best.
+
+        :param c_best: length of the best path found
+        :return: new randomly placed node
+        """
+        c_min, theta = self.calculateDistanceAndAngle(self.start, self.end)
+        r1 = c_best / 2
+        r2 = math.sqrt(max(c_best ** 2 - c_min ** 2, 0.0)) / 2
+
+        # Uniform point in the unit circle, stretched to the ellipse, then rotated and moved between start and goal
+        r = math.sqrt(self.rng.random())
+        angle = 2 * math.pi * self.rng.random()
+        ex = r * math.cos(angle) * r1
+        ey = r * math.sin(angle) * r2
+        x = (self.start.x + self.end.x) / 2 + ex * math.cos(theta) - ey * math.sin(theta)
+        y = (self.start.y + self.end.y) / 2 + ex * math.sin(theta) + ey * math.cos(theta)
+        return self.Node(x, y)
 
     def chooseParent(self, new_node, near_inds):
         """
@@ -115,57 +299,77 @@ class RRTStar(RRT):
 
         :param new_node: node to check with
         :param near_inds: list of near node indexes
-        :return: new_node with updated parent
+        :return: index of the best parent and the cost of new_node through it, None if no near node can be reached
         """
         if not near_inds:
             return None
 
-        # search nearest cost in near_inds
+        # search nearest cost in near_inds. The cost is rounded, but never below the cost of the parent, so the costs
+        # never go down along a path, which rewire needs to not make loops
         costs = []
-        for i in near_inds:
+        collision_free = self.edgesCollisionFree(new_node, near_inds)
+        for i, no_collision in zip(near_inds, collision_free):
             near_node = self.node_list[i]
-            t_node = self.steer(near_node, new_node)
-            if t_node and self.checkObstacle(t_node, self.lineList, self.edge_dist):
-                costs.append(round(self.calculateNewCost(near_node, new_node)))
+            if no_collision:
+                costs.append(max(round(self.calculateNewCost(near_node, new_node)), float(self.nodeStore.cost[i])))
             else:
                 costs.append(float("inf"))  # the cost of collision node
         min_cost = min(costs)
 
         if min_cost == float("inf"):
-            print("There is no good path.(min_cost is inf)")
             return None
 
         min_ind = near_inds[costs.index(min_cost)]
-        new_node = self.steer(self.node_list[min_ind], new_node)
-        new_node.parent = self.node_list[min_ind]
-        new_node.cost = min_cost
-
-        return new_node
+        return min_ind, min_cost
 
     def searchBestGoalNode(self):
         """
-        Searches for the best node to go to goal with.
+        Searches for the best node to go to goal with. Only the goal candidates added since the last search are
+        checked for collision, the nodes never move so the result of a check stays valid. The cheapest safe node is
+        kept up to date by updateBestGoal when the tree is rewired, so it does not have to be searched for.
 
         :return: index for best node
         """
-        dist_to_goal_list = [self.calculateDistanceToGoal(n.x, n.y) for n in self.node_list]
-        goal_inds = [dist_to_goal_list.index(i) for i in dist_to_goal_list if i <= self.expand_dis]
+        if self.pendingGoals:
+            with self.profiler.timer("goal_search"):
+                collision_free = self.edgesCollisionFree(self.goal_node, self.pendingGoals)
+                for goal_ind, no_collision in zip(self.pendingGoals, collision_free):
+                    if no_collision:
+                        self.safeGoals.add(goal_ind)
+                        self.updateBestGoal(goal_ind)
+                self.pendingGoals = []
+        return self.bestGoalIndex
+
+    def updateBestGoal(self, index):
+        """
+        Updates the cheapest safe goal candidate after a node was found safe or its cost changed. Only if the cheapest
+        one got more expensive are all the safe candidates searched again. On equal cost the node added first is the
+        best.
 
-        safe_goal_inds = []
-        for goal_ind in goal_inds:
-            t_node = self.steer(self.node_list[goal_ind], self.goal_node)
-            if self.checkObstacle(t_node, self.lineList, self.edge_dist):
-                safe_goal_inds.append(goal_ind)
+        :param index: index of the node
+        :return: None
+        """
+        if index not in self.safeGoals:
+            return
+        key = (self.nodeStore.cost[index], index)
+        if index == self.bestGoalIndex and key > self.bestGoalKey:
+            self.bestGoalKey = min((self.nodeStore.cost[i], i) for i in self.safeGoals)
+            self.bestGoalIndex = self.bestGoalKey[1]
+        elif self.bestGoalKey is None or key <= self.bestGoalKey:
+            self.bestGoalKey = key
+            self.bestGoalIndex = index
+
+    def bestCost(self):
+        """
+        Gets the cost of the best path to the goal in the tree. Only the goal candidates already checked by
+        searchBestGoalNode are used, so no collision checks are done
 
-        if not safe_goal_inds:
+        :return: the cost, None if no node in the tree can reach the goal yet
+        """
+        if self.bestGoalIndex is None:
             return None
-
-        min_cost = min([self.node_list[i].cost for i in safe_goal_inds])
-        for i in safe_goal_inds:
-            if self.node_list[i].cost == min_cost:
-                return i
-
-        return None
+        goal_node = self.node_list[self.bestGoalIndex]
+        return float(self.nodeStore.cost[self.bestGoalIndex]) + self.calculateDistanceToGoal(goal_node.x, goal_node.y)
 
     def findNearNodes(self, new_node):
         """
@@ -178,37 +382,33 @@ class RRTStar(RRT):
         r = self.connect_circle_dist * math.sqrt((math.log(nnode) / nnode))
         #r = 100
 
-        dist_list = []
-        for node in self.node_list:
-            dist = (node.x - new_node.x) ** 2 + (node.y - new_node.y) ** 2
-            dist_list.append(dist)
-        #dist_list = [(node.x - new_node.x) ** 2 + (node.y - new_node.y) ** 2 for node in self.node_list]
-
-        near_inds = [dist_list.index(i) for i in dist_list if i <= r ** 2]
+        near_inds = self.nodeIndex.near(new_node.x, new_node.y, r)
         return near_inds
 
     def rewire(self, new_node, near_inds):
         """
-        Tries to rewire the path to be more cost efficient
+        Tries to rewire the path to be more cost efficient. A near node is only rewired if the path through new_node
+        is strictly cheaper. The costs never go down along a path, so an ancestor of new_node costs at most as much as
+        new_node, and can never be rewired to it and make a loop
 
         :param new_node: node for which to try to rewire
         :param near_inds: indexes of nearby nodes
         :return: nothing
         """
-        for i in near_inds:
-            near_node = self.node_list[i]
-            edge_node = self.steer(new_node, near_node)
-            if not edge_node:
-                continue
-            edge_node.cost = self.calculateNewCost(new_node, near_node)
+        collision_free = self.edgesCollisionFree(new_node, near_inds)
+        for i, no_collision in zip(near_inds, collision_free):
+            new_cost = self.calculateNewCost(new_node, self.node_list[i])
 
-            no_collision = self.checkObstacle(edge_node, self.lineList, self.edge_dist)
-            improved_cost = near_node.cost > edge_node.cost
+            improved_cost = self.nodeStore.cost[i] > new_cost
 
             if no_collision and improved_cost:
-                near_node = edge_node
-                near_node.parent = new_node
-                self.propagateCostToLeaves(new_node)
+                self.children[self.nodeStore.parent[i]].remove(i)
+                self.children[new_node.index].append(i)
+                self.nodeStore.parent[i] = new_node.index
+                self.nodeStore.cost[i] = new_cost
+                self.updateBestGoal(i)
+                with self.profiler.timer("propagate"):
+                    self.propagateCostToLeaves(i)
 
     def calculateNewCost(self, from_node, to_node):
         """
@@ -221,19 +421,145 @@ class RRTStar(RRT):
         d, _ = self.calculateDistanceAndAngle(from_node, to_node)
         if from_node == self.start:
             d += 5
-        return from_node.cost + d
+        return float(self.nodeStore.cost[from_node.index]) + d
 
-    def propagateCostToLeaves(self, parent_node):
+    def propagateCostToLeaves(self, parent_index):
         """
-        Updates the cost of the path for the nodes parents recursively
+        Updates the cost of the path for every node below a node. Only walks the subtree, with a stack
+        instead of recursion so deep trees do not hit the recursion limit.
 
-        :param parent_node: the node to check against
+        :param parent_index: index of the node whose cost changed
         :return: None
         """
-        for node in self.node_list:
-            if node.parent == parent_node:
-                node.cost = self.calculateNewCost(parent_node, node)
-                self.propagateCostToLeaves(node)
+        stack = [parent_index]
+        while stack:
+            index = stack.pop()
+            node = self.node_list[index]
+            for child in self.children[index]:
+                self.nodeStore.cost[child] = self.calculateNewCost(node, self.node_list[child])
+                self.updateBestGoal(child)
+                stack.append(child)
+
+    def replan(self, start, fraction=0.5, deadline=None, search_until_max_iter=False):
+        """
+        Moves the root of the tree to a new start and keeps the rest of the tree. Used when the snake has moved away
+        from the path.\n
+        Edges that collide with the current lineList are pruned together with everything below them. The new root
+        is connected to the closest node it can see, and the tree is turned around so the paths from that node back
+        to the old root now lead away from the new root.\n
+        If the kept tree still reaches the goal, that path is returned right away. Only if it does not is the tree
+        grown again, for at most a fraction of the iterations that built it.
+
+        :param start: coordinates of the new start
+        :param fraction: part of the iterations that built the tree it can be grown for when it does not reach the goal
+        :param deadline: time.monotonic() to stop growing the tree at, None to only stop at the iteration limit
+        :param search_until_max_iter: grow for all the iterations to improve the path, instead of stopping at the
+            first path found
+        :return: the path from goal to the new start, None if no path was found
+        """
+        built_iterations = self.iterations
+        old_nodes = self.node_list
+        old_children = self.children
+        self.prepareCollisionChecker()
+        if not old_nodes:
+            self.start = self.Node(start[0], start[1])
+            return self.planning(deadline=deadline)
+
+        # Keep the nodes that can still be reached from the old root through edges that do not collide
+        valid = self.validEdges()
+        kept = [False] * len(old_nodes)
+        kept[0] = True
+        neighbours = [[] for _ in old_nodes]
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            for child in old_children[i]:
+                if valid[child]:
+                    kept[child] = True
+                    neighbours[i].append(child)
+                    neighbours[child].append(i)
+                    stack.append(child)
+        kept_inds = [i for i in range(len(old_nodes)) if kept[i]]
+
+        root = self.Node(start[0], start[1])
+        free = self.edgesCollisionFree(root, kept_inds)
+        visible = [i for i, no_collision in zip(kept_inds, free) if no_collision]
+        self.start = root
+        if not visible:
+            Logger.logg("RRT* replan cannot see the old tree, planning from scratch", Logger.info)
+            return self.planning(deadline=deadline)
+        attach = min(visible, key=lambda i: self.calculateDistanceAndAngle(root, old_nodes[i])[0])
+
+        # Walk the kept tree outwards from the attach node, every node gets the node it was reached from as parent
+        self.initTree()
+        visited = [False] * len(old_nodes)
+        visited[attach] = True
+        queue = deque([(attach, root)])
+        while queue:
+            i, parent = queue.popleft()
+            node = old_nodes[i]
+            self.addNode(node, parent.index, self.calculateNewCost(parent, node))
+            for j in neighbours[i]:
+                if not visited[j]:
+                    visited[j] = True
+                    queue.append((j, node))
+
+        status = "found"
+        last_index = self.searchBestGoalNode()
+        if last_index is None:
+            # The iterations are counted on from the ones that built the tree
+            status = "max_iter"
+            for i in range(min(max(1, int(built_iterations * fraction)), self.max_iter)):
+                if self.deadlinePassed(deadline):
+                    status = "deadline"
+                    break
+                new_node = self.growTree(built_iterations + i)
+                if not search_until_max_iter and new_node and self.searchBestGoalNode() is not None:
+                    break
+            last_index = self.searchBestGoalNode()
+            if last_index is None:
+                return self.finishPlanning(None, status)
+            if status == "max_iter":
+                status = "found"
+
+        Logger.logg(f"RRT* replanned path, nodes kept: {len(kept_inds)} of {len(old_nodes)}, "
+                    f"iterations: {self.iterations - built_iterations}", Logger.info)
+        return self.finishPlanning(self.generateFinalCourse(last_index), status)
+
+    def validEdges(self):
+        """
+        Checks every edge in the tree against the current obstacles.
+
+        :return: list with a bool for every node, True if the edge from its parent is free. True for the root
+        """
+        valid = [True] * len(self.node_list)
+        children = np.flatnonzero(self.nodeStore.parent[:len(self.node_list)] != NO_PARENT)
+        edges = self.nodeStore.edges()
+        self.collisionChecks += len(children)
+        if self.collisionChecker is None:
+            free = [self.checkObstacle(edge, self.lineList, self.edge_dist) for edge in edges]
+        else:
+            free = self.collisionChecker.checkSegments(edges)
+        for i, no_collision in zip(children, free):
+            valid[i] = bool(no_collision)
+        return valid
+
+    def runHeadless(self, finishLoops=False, deadline=None):
+        """
+        Runs the RRT_Star-class without drawing anything. Use drawTree in ImageProcessing.draw to show the result.
+
+        :param finishLoops: search until max iteration for path improving or not
+        :param deadline: time.monotonic() to stop at, None to only stop at max_iter
+        :return: the path (None if no path was found) and a dict of statistics about the tree
+        """
+        Logger.logg("Running RRT*", Logger.info)
+        startTime = time.time()
+        path = self.planning(animation=False, search_until_max_iter=finishLoops, deadline=deadline)
+        stats = self.treeStats(path, time.time() - startTime)
+
+        if path is None:
+            Logger.logg("RRT* Cannot find path", Logger.info)
+        return path, stats
 
     def run(self, finishLoops=False):
         """
@@ -241,6 +567,8 @@ class RRTStar(RRT):
 
         :return: picture of the figure as a NP-array with the path
         """
+        import matplotlib.pyplot as plt
+
         Logger.logg("Running RRT*", Logger.info)
         path = self.planning(animation=show_animation, search_until_max_iter=finishLoops)
 
@@ -275,6 +603,49 @@ class RRTStar(RRT):
         return data, path
 
 
+# Keyword arguments for RRTStar that are the same for every planner in a run of multiRRTStar, see initPlanner
+sharedPlannerArgs = {}
+
+
+def initPlanner(sharedArgs):
+    """
+    Stores the keyword arguments that every RRT* in a run shares. Used as the initializer of the process pool in
+    multiRRTStar, so the maze and the clearance map are sent to each process once instead of with every job. The
+    processes do not write to the log file, multiRRTStar logs the results of their runs.
+
+    :param sharedArgs: dict of keyword arguments for RRTStar
+    :return: None
+    """
+    global sharedPlannerArgs
+    sharedPlannerArgs = sharedArgs
+    Logger.enabled = False
+
+
+def planPath(plannerArgs, sharedArgs=None):
+    """
+    Runs one RRT* from start to goal without drawing anything. Kept at module level so it can be sent to the
+    process pool in multiRRTStar.
+
+    :param plannerArgs: dict of keyword arguments for RRTStar. Can also have deadline, a time.monotonic() to stop at,
+        and time_budget, the max number of seconds to plan from when the run starts
+    :param sharedArgs: keyword arguments the run shares, None for the ones stored by initPlanner
+    :return: path from start to goal (None if no path was found), and the statistics of the run
+    """
+    plannerArgs = dict(sharedPlannerArgs if sharedArgs is None else sharedArgs, **plannerArgs)
+    deadline = plannerArgs.pop("deadline", None)
+    timeBudget = plannerArgs.pop("time_budget", None)
+    if timeBudget is not None:
+        deadline = time.monotonic() + timeBudget if deadline is None else min(deadline, time.monotonic() + timeBudget)
+
+    rrtStar = RRTStar(**plannerArgs)
+    startTime = time.time()
+    path = rrtStar.planning(animation=False, search_until_max_iter=False, deadline=deadline)
+    stats = rrtStar.treeStats(path, time.time() - startTime)
+    if path is None:
+        return None, stats
+    return path[::-1], stats
+
+
 class multiRRTStar:
     """
     Implements the RRT* for a list of several goals to reach.
@@ -282,7 +653,9 @@ class multiRRTStar:
 
     def __init__(self, rand_area_x=None, rand_area_y=None, lineList=None, expand_dis=100.0,
                  path_resolution=10.0, max_iter=2000, goal_sample_rate=30, edge_dist=30, connect_circle_dist=450,
-                 start_point=None, listOfDeadEnds=None):
+                 start_point=None, listOfDeadEnds=None, node_index="grid", collision_engine="vectorized",
+                 clearance_map=None, workers=1, seed=None, order="greedy", rng=None, profile=False,
+                 progress=None, time_budget=None):
         """
 
         :param rand_area_x: Range on the x-axis the new nodes can be placed
@@ -296,6 +669,20 @@ class multiRRTStar:
         :param connect_circle_dist: Circle distance the nodes will search for nearby nodes
         :param start_point: Start point for the RRT
         :param listOfDeadEnds: List of coordinates for dead ends
+        :param node_index: Spatial index the planners use for nearest node searches, "grid" or "list"
+        :param collision_engine: Collision engine the planners use, "vectorized", "shapely" or "clearance"
+        :param clearance_map: ClearanceMap of the maze, needed for the "clearance" collision engine
+        :param workers: Number of processes planning at the same time, None for one per CPU, 1 to plan in this process.
+            The process pool is kept between runs, call close when done with the planner
+        :param seed: Seed for the planners, every planner gets its own seed drawn from this. None for random seeds
+        :param order: How to choose the order of the dead ends. "greedy" plans to every remaining dead end and goes to
+            the closest one each round, "tsp" plans between every pair of points once and solves the order as a
+            travelling salesman problem
+        :param rng: random.Random to draw the seeds for the planners from, instead of making one from seed
+        :param profile: profile every planner, the profiles of all the planners in a run are summed in profiler
+        :param progress: ProgressReporter to send the progress to, reported each time one of the planners is done
+        :param time_budget: Max number of seconds a run can take, None to let every planner run to max_iter. The time
+            is split between the rounds by the number of planners in them, and between the planners in a round
         """
 
         self.rand_area_x = rand_area_x
@@ -309,31 +696,145 @@ class multiRRTStar:
         self.connect_circle_dist = connect_circle_dist
         self.start_point = start_point
         self.listOfDeadEnds = listOfDeadEnds
+        self.node_index = node_index
+        self.collision_engine = collision_engine
+        self.clearance_map = clearance_map
+        self.workers = workers
+        self.seed = seed
+        self.rng = rng
+        self.seedRng = rng if rng is not None else random.Random(seed)
+        self.order = order
+        self.runStats = []
+        self.profile = profile
+        self.profiler = PlannerStats(enabled=profile)
+        self.progress = progress
+        self.time_budget = time_budget
+        self.deadline = None
+        # Why the last run stopped: "found", "max_iter" or "deadline", see RRT.finishPlanning
+        self.status = None
+        self.pool = None
+        # The workers and the shared arguments the pool was made with
+        self.poolArgs = None
         self.i = 1
 
-    def findAllPaths(self, startpoint, pointList: list):
+    def sharedArgs(self):
+        """
+        Makes the keyword arguments that are the same for every RRT* run, see initPlanner
+
+        :return: dict of keyword arguments for RRTStar
+        """
+        return dict(rand_area_x=self.rand_area_x, rand_area_y=self.rand_area_y,
+                    lineList=self.lineList, expand_dis=self.expand_dis, path_resolution=self.path_resolution,
+                    max_iter=self.max_iter, goal_sample_rate=self.goal_sample_rate,
+                    edge_dist=self.edge_dist, connect_circle_dist=self.connect_circle_dist,
+                    node_index=self.node_index, collision_engine=self.collision_engine,
+                    clearance_map=self.clearance_map, profile=self.profile)
+
+    def plannerArgs(self, startpoint, goalpoint):
         """
-        Iterates from a start point to the different points. Saves all paths in a list
+        Makes the keyword arguments for one RRT* run that are not in sharedArgs. Draws a new seed for each run when a
+        seed or rng is set.
 
         :param startpoint: (x,y) for start point
-        :param pointList: List of points to iterate to
-        :return: List of paths
+        :param goalpoint: (x,y) for goal point
+        :return: dict of keyword arguments for RRTStar
         """
-        paths = []
+        seed = self.seedRng.getrandbits(32) if self.seed is not None or self.rng is not None else None
+        return dict(start=[startpoint[0], startpoint[1]], goal=[goalpoint[0], goalpoint[1]], seed=seed)
 
-        for points in pointList:
-            rrtStar = RRTStar(start=[startpoint[0], startpoint[1]], goal=[points[0], points[1]],
-                              rand_area_x=self.rand_area_x, rand_area_y=self.rand_area_y,
-                              lineList=self.lineList, expand_dis=self.expand_dis, path_resolution=self.path_resolution,
-                              max_iter=self.max_iter, goal_sample_rate=self.goal_sample_rate,
-                              edge_dist=self.edge_dist, connect_circle_dist=self.connect_circle_dist)
-            _, path = rrtStar.run(finishLoops=False)
-            paths.append(path[::-1])
+    def planAll(self, jobs, share=1.0):
+        """
+        Runs the planners, in the process pool if there is one. When the run has a deadline, the jobs get a share of
+        the time left, split evenly between the planners that run one after another.
+
+        :param jobs: list of keyword arguments from plannerArgs
+        :param share: part of the time left until the deadline these jobs can use
+        :return: list of paths in the same order as the jobs, None where no path was found
+        """
+        if self.deadline is not None and jobs:
+            roundTime = max(self.deadline - time.monotonic(), 0.0) * share
+            workers = 1 if self.pool is None else (self.workers or os.cpu_count() or 1)
+            jobTime = roundTime / math.ceil(len(jobs) / workers)
+            roundDeadline = time.monotonic() + roundTime
+            jobs = [dict(job, deadline=roundDeadline, time_budget=jobTime) for job in jobs]
+
+        if self.pool is None:
+            sharedArgs = self.sharedArgs()
+            runs = (planPath(job, sharedArgs) for job in jobs)
+        else:
+            runs = self.pool.map(planPath, jobs)
+
+        results = []
+        for path, stats in runs:
+            if self.pool is not None:
+                Logger.logg(f"RRT* in process pool stopped: {stats['status']}, iterations: {stats['iterations']}",
+                            Logger.info)
+            results.append((path, stats))
+            self.runStats.append(stats)
+            self.profiler.merge(stats.get("profile"))
+            self.reportProgress()
+        return [path for path, _ in results]
+
+    def reportProgress(self, force=False, bestCost=None):
+        """
+        Sends the number of iterations and nodes of all the planners so far to the progress reporter, if there is
+        one and it is time for a new report.
+
+        :param force: send the report even if the last one was sent too recently
+        :param bestCost: length of the whole path, None while it is not known
+        :return: None
+        """
+        if self.progress is not None:
+            self.progress.report("multiRRT*", sum(s["iterations"] for s in self.runStats),
+                                 sum(s["nodes"] for s in self.runStats), bestCost, force)
+
+    def failedStatus(self):
+        """
+        Finds out why a run did not find a path
+
+        :return: "deadline" if any of the planners ran out of time, "max_iter" otherwise
+        """
+        if any(stats["status"] == "deadline" for stats in self.runStats):
+            return "deadline"
+        return "max_iter"
+
+    def findAllPaths(self, startpoint, pointList: list):
+        """
+        Plans from a start point to the different points. Saves all paths in a list
+
+        :param startpoint: (x,y) for start point
+        :param pointList: List of points to plan to
+        :return: List of paths, None where no path was found
+        """
+        jobs = [self.plannerArgs(startpoint, points) for points in pointList]
+        # This round plans to n points, and the rounds after it to n - 1, n - 2, ..., 1 points
+        paths = self.planAll(jobs, share=2 / (len(pointList) + 1))
 
         print(f"Done with round {self.i} of {len(self.listOfDeadEnds)}")
         self.i += 1
         return paths
 
+    def findPathMatrix(self, pointList: list):
+        """
+        Plans between every pair of points once. The path from B to A is the path from A to B reversed.
+
+        :param pointList: List of points, the first one is the start point
+        :return: Matrix (list of lists) where [i][j] is the path from point i to point j, None where no path was found
+        """
+        n = len(pointList)
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        jobs = [self.plannerArgs(pointList[i], pointList[j]) for (i, j) in pairs]
+        paths = self.planAll(jobs)
+
+        pathMatrix = [[None] * n for _ in range(n)]
+        for (i, j), path in zip(pairs, paths):
+            if path is not None:
+                pathMatrix[i][j] = path
+                pathMatrix[j][i] = path[::-1]
+
+        print(f"Planned {len(jobs)} paths between {n} points")
+        return pathMatrix
+
     def sumPaths(self, pathList):
         """
         Finds the lengths of paths in a given list
@@ -354,6 +855,55 @@ class multiRRTStar:
 
         return listOfLengths
 
+    def findTourPath(self, startPoint, deadEndList):
+        """
+        Plans between all pairs of the start point and the dead ends, then finds the order to visit the dead ends in
+        with a travelling salesman heuristic.
+
+        :param startPoint: (x,y) for the start point
+        :param deadEndList: List of dead ends to visit
+        :return: List of paths, one for each leg of the tour. None if the dead ends can not all be reached
+        """
+        points = [startPoint] + list(deadEndList)
+        pathMatrix = self.findPathMatrix(points)
+        costs = [self.sumPaths(row) for row in pathMatrix]
+        for i in range(len(points)):
+            costs[i][i] = 0.0
+
+        tour, tourCost = solveOpenTour(costs, start=0)
+        if tourCost == float("inf"):
+            Logger.logg("multiRRT* could not find paths between all the dead ends", Logger.info)
+            return None
+
+        return [pathMatrix[tour[i]][tour[i + 1]] for i in range(len(tour) - 1)]
+
+    def openPool(self):
+        """
+        Makes the process pool if there is none. The maze is sent to every process once, when the pool is made, so
+        the jobs only carry start, goal, seed and time. The pool is kept between runs, and only made again when the
+        number of workers or any of the shared arguments, like the maze, has changed.
+
+        :return: None
+        """
+        poolArgs = (self.workers, self.sharedArgs())
+        if self.pool is not None and poolArgs[0] == self.poolArgs[0] and \
+                all(value is self.poolArgs[1][key] for key, value in poolArgs[1].items()):
+            return
+        self.close()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=initPlanner, initargs=(poolArgs[1],))
+        self.poolArgs = poolArgs
+
+    def close(self):
+        """
+        Shuts down the process pool, if there is one
+
+        :return: None
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            self.poolArgs = None
+
     def run(self):
         """
         Runs RRT* a multitude of times to try to find the best path from the snakes start through all the different
@@ -368,27 +918,66 @@ class multiRRTStar:
         deadEndList = self.listOfDeadEnds.copy()
 
         newStartPoint = self.start_point
+        if self.rng is None:
+            self.seedRng = random.Random(self.seed)
+        self.i = 1
+        self.runStats = []
+        self.profiler.reset()
+        self.deadline = None if self.time_budget is None else time.monotonic() + self.time_budget
+        self.status = None
 
-        while len(deadEndList) > 0:
-            pathList = self.findAllPaths(newStartPoint, deadEndList)
-
-            pathSumList = self.sumPaths(pathList)
-
-            indexNewStartPoint = pathSumList.index(min(pathSumList))
-
-            finalPath.append(pathList[indexNewStartPoint])
-
-            newStartPoint = deadEndList.pop(indexNewStartPoint)
+        if self.workers == 1:
+            self.close()
+        else:
+            self.openPool()
+        try:
+            if self.order == "tsp":
+                finalPath = self.findTourPath(newStartPoint, deadEndList)
+                if finalPath is None:
+                    self.status = self.failedStatus()
+                    return None
+                deadEndList = []
+
+            while len(deadEndList) > 0:
+                pathList = self.findAllPaths(newStartPoint, deadEndList)
+
+                pathSumList = self.sumPaths(pathList)
+
+                if min(pathSumList) == float("inf"):
+                    Logger.logg("multiRRT* could not find a path to any of the remaining dead ends", Logger.info)
+                    self.status = self.failedStatus()
+                    return None
+
+                indexNewStartPoint = pathSumList.index(min(pathSumList))
+
+                finalPath.append(pathList[indexNewStartPoint])
+
+                newStartPoint = deadEndList.pop(indexNewStartPoint)
+        except Exception:
+            # A broken pool is not used again
+            self.close()
+            raise
+        finally:
+            # Failed runs are profiled too
+            self.profiler.logg("multiRRT*")
 
         print(f"time: {time.time()- startTime}")
+        self.status = "found"
         pathLenght = self.sumPaths(finalPath)
         sumPath = sum(pathLenght)
+        self.reportProgress(force=True, bestCost=sumPath)
         print(f"lenght: {sumPath}")
 
         return finalPath
 
 
 if __name__ == "__main__":
+    import cv2
+    import matplotlib.pyplot as plt
+    from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
+    from Python.ImageProcessing.deadEndDetector import DeadEndDetector
+    from Python.ImageProcessing.draw import drawLines
+
     enkelRRT = False
     multidriftRRT = True
 
@@ -0,0 +1,231 @@
+"""
+Spatial indexes used by the RRT-planners to find the nearest node and the nodes within a radius without having to
+check every node in the tree.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import math
+
+
+class ListIndex:
+    """
+    Checks every node for every query. This is how the planners originally searched the tree, kept so the
+    indexes can be compared against each other.
+    """
+
+    def __init__(self):
+        self.points = []
+
+    def __len__(self):
+        return len(self.points)
+
+    def insert(self, x, y):
+        """
+        Adds a point to the index. The index of the point is the order it was inserted in.
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the point
+        """
+        self.points.append((x, y))
+        return len(self.points) - 1
+
+    def nearest(self, x, y):
+        """
+        Finds the point closest to the coordinates
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the nearest point, None if the index is empty
+        """
+        dlist = [(px - x) ** 2 + (py - y) ** 2 for (px, py) in self.points]
+        if not dlist:
+            return None
+        return dlist.index(min(dlist))
+
+    def near(self, x, y, radius):
+        """
+        Finds all points within a radius of the coordinates
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :param radius: radius to search within
+        :return: list of indexes, in the order they were inserted
+        """
+        r2 = radius ** 2
+        return [i for i, (px, py) in enumerate(self.points) if (px - x) ** 2 + (py - y) ** 2 <= r2]
+
+
+class GridIndex:
+    """
+    Uniform grid of buckets. Points are put in the bucket of the cell they are in, and queries only look at the
+    cells around the query point. Falls back to checking every point when that is cheaper than walking the cells.
+    """
+
+    def __init__(self, cellSize):
+        """
+
+        :param cellSize: width and height of one cell, should be about the expand distance of the planner
+        """
+        if cellSize <= 0:
+            raise ValueError("cellSize must be positive")
+        self.cellSize = float(cellSize)
+        self.points = []
+        self.cells = {}
+        self.minCell = None
+        self.maxCell = None
+
+    def __len__(self):
+        return len(self.points)
+
+    def cellOf(self, x, y):
+        """
+        Gets the cell a set of coordinates is in
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: (column, row) of the cell
+        """
+        return int(math.floor(x / self.cellSize)), int(math.floor(y / self.cellSize))
+
+    def insert(self, x, y):
+        """
+        Adds a point to the index. The index of the point is the order it was inserted in.
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the point
+        """
+        index = len(self.points)
+        self.points.append((x, y))
+        cell = self.cellOf(x, y)
+        self.cells.setdefault(cell, []).append(index)
+
+        if self.minCell is None:
+            self.minCell = list(cell)
+            self.maxCell = list(cell)
+        else:
+            self.minCell[0] = min(self.minCell[0], cell[0])
+            self.minCell[1] = min(self.minCell[1], cell[1])
+            self.maxCell[0] = max(self.maxCell[0], cell[0])
+            self.maxCell[1] = max(self.maxCell[1], cell[1])
+        return index
+
+    def nearest(self, x, y):
+        """
+        Finds the point closest to the coordinates by searching rings of cells outwards from the query point.
+        On equal distance the point inserted first is returned, same as ListIndex.
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the nearest point, None if the index is empty
+        """
+        if not self.points:
+            return None
+
+        cx, cy = self.cellOf(x, y)
+        # No point can be further away (in cells) than the corners of the occupied area
+        maxRing = max(abs(cx - self.minCell[0]), abs(cx - self.maxCell[0]),
+                      abs(cy - self.minCell[1]), abs(cy - self.maxCell[1]))
+
+        best = None
+        bestDist = float("inf")
+        ring = 0
+        while ring <= maxRing:
+            if (2 * ring + 1) ** 2 > len(self.points):
+                # Walking the cells is now more work than checking every point
+                return self.nearestBruteForce(x, y)
+
+            for cell in self.ringCells(cx, cy, ring):
+                for i in self.cells.get(cell, ()):
+                    px, py = self.points[i]
+                    d = (px - x) ** 2 + (py - y) ** 2
+                    if d < bestDist or (d == bestDist and i < best):
+                        best = i
+                        bestDist = d
+
+            # Everything in the next ring is at least ring * cellSize away
+            if best is not None and bestDist <= (ring * self.cellSize) ** 2:
+                break
+            ring += 1
+
+        return best
+
+    def nearestBruteForce(self, x, y):
+        """
+        Finds the nearest point by checking all of them
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: index of the nearest point
+        """
+        best = None
+        bestDist = float("inf")
+        for i, (px, py) in enumerate(self.points):
+            d = (px - x) ** 2 + (py - y) ** 2
+            if d < bestDist:
+                best = i
+                bestDist = d
+        return best
+
+    def near(self, x, y, radius):
+        """
+        Finds all points within a radius of the coordinates
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :param radius: radius to search within
+        :return: list of indexes, in the order they were inserted
+        """
+        r2 = radius ** 2
+        minX, minY = self.cellOf(x - radius, y - radius)
+        maxX, maxY = self.cellOf(x + radius, y + radius)
+
+        if (maxX - minX + 1) * (maxY - minY + 1) > len(self.points):
+            return [i for i, (px, py) in enumerate(self.points) if (px - x) ** 2 + (py - y) ** 2 <= r2]
+
+        inds = []
+        for col in range(minX, maxX + 1):
+            for row in range(minY, maxY + 1):
+                for i in self.cells.get((col, row), ()):
+                    px, py = self.points[i]
+                    if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                        inds.append(i)
+        inds.sort()
+        return inds
+
+    @staticmethod
+    def ringCells(cx, cy, ring):
+        """
+        Gets the cells that are exactly ring cells away from the center cell
+
+        :param cx: column of the center cell
+        :param cy: row of the center cell
+        :param ring: distance in cells from the center
+        :return: generator of (column, row)
+        """
+        if ring == 0:
+            yield cx, cy
+            return
+        for col in range(cx - ring, cx + ring + 1):
+            yield col, cy - ring
+            yield col, cy + ring
+        for row in range(cy - ring + 1, cy + ring):
+            yield cx - ring, row
+            yield cx + ring, row
+
+
+def createNodeIndex(kind, cellSize):
+    """
+    Creates a spatial index of the given kind
+
+    :param kind: "grid" or "list"
+    :param cellSize: cell size used by the grid index
+    :return: the index
+    """
+    if kind == "grid":
+        return GridIndex(cellSize)
+    elif kind == "list":
+        return ListIndex()
+    raise ValueError(f"Unknown node index: {kind}")
@@ -0,0 +1,135 @@
+"""
+Finds the order to visit a set of points in, given the cost of going between every pair of them. The tour starts
+in the first point and does not return to it (an open travelling salesman path).
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+# Stand-in for an infinite cost, so improvements can still be calculated when some legs have no path
+NO_PATH_COST = 1e12
+
+
+def finiteCosts(costs):
+    """
+    Replaces infinite costs with a big number
+
+    :param costs: square matrix (list of lists) of costs
+    :return: copy of the matrix with only finite costs
+    """
+    return [[c if c != float("inf") else NO_PATH_COST for c in row] for row in costs]
+
+
+def tourCost(tour, costs):
+    """
+    Calculates the total cost of an open tour
+
+    :param tour: list of point indexes in the order they are visited
+    :param costs: square matrix of costs
+    :return: the sum of the costs of the legs
+    """
+    return sum(costs[tour[i]][tour[i + 1]] for i in range(len(tour) - 1))
+
+
+def nearestNeighbourTour(costs, start=0):
+    """
+    Makes a tour by always going to the cheapest point not yet visited
+
+    :param costs: square matrix of costs
+    :param start: index of the start point
+    :return: list of point indexes
+    """
+    unvisited = set(range(len(costs)))
+    unvisited.remove(start)
+    tour = [start]
+    while unvisited:
+        current = tour[-1]
+        nextPoint = min(unvisited, key=lambda p: (costs[current][p], p))
+        tour.append(nextPoint)
+        unvisited.remove(nextPoint)
+    return tour
+
+
+def twoOpt(tour, costs):
+    """
+    Reverses parts of the tour as long as that makes it cheaper. The first point is kept in place.
+
+    :param tour: list of point indexes
+    :param costs: square matrix of symmetric costs
+    :return: the improved tour
+    """
+    tour = list(tour)
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                before = costs[tour[i - 1]][tour[i]]
+                after = costs[tour[i - 1]][tour[j]]
+                if j < n - 1:
+                    before += costs[tour[j]][tour[j + 1]]
+                    after += costs[tour[i]][tour[j + 1]]
+                if after < before - 1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    improved = True
+    return tour
+
+
+def orOpt(tour, costs, maxSegment=3):
+    """
+    Moves segments of up to maxSegment points to another place in the tour, forwards or reversed, as long as that
+    makes it cheaper. The first point is kept in place.
+
+    :param tour: list of point indexes
+    :param costs: square matrix of symmetric costs
+    :param maxSegment: longest segment to move
+    :return: the improved tour
+    """
+    tour = list(tour)
+    improved = True
+    while improved:
+        improved = False
+        bestCost = tourCost(tour, costs)
+        for length in range(1, maxSegment + 1):
+            for i in range(1, len(tour) - length + 1):
+                segment = tour[i:i + length]
+                rest = tour[:i] + tour[i + length:]
+                for j in range(1, len(rest) + 1):
+                    for candidate in (segment, segment[::-1]):
+                        newTour = rest[:j] + candidate + rest[j:]
+                        newCost = tourCost(newTour, costs)
+                        if newCost < bestCost - 1e-9:
+                            tour = newTour
+                            bestCost = newCost
+                            improved = True
+                            break
+                    if improved:
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+    return tour
+
+
+def solveOpenTour(costs, start=0):
+    """
+    Finds a cheap order to visit every point in, starting in start. Uses a nearest neighbour tour improved with
+    2-opt and Or-opt until neither can improve it.
+
+    :param costs: square matrix of symmetric costs, float("inf") where there is no path
+    :param start: index of the start point
+    :return: list of point indexes, and the cost of the tour (inf if it uses a leg without a path)
+    """
+    if len(costs) == 0:
+        return [], 0.0
+
+    finite = finiteCosts(costs)
+    tour = nearestNeighbourTour(finite, start)
+    while True:
+        cost = tourCost(tour, finite)
+        tour = orOpt(twoOpt(tour, finite), finite)
+        if tourCost(tour, finite) >= cost - 1e-9:
+            break
+
+    return tour, tourCost(tour, costs)
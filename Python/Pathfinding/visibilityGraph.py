@@ -0,0 +1,313 @@
+"""
+Deterministic planner for mazes made of straight walls. The shortest way around a wall passes close to its ends, so
+the nodes of the graph are points just outside the ends of the inflated walls. The edges between them are checked for
+collision in one batch when the planner first sees a maze and are kept on the planner, so planning again in the same
+maze only checks the edges from the start and the goal before A* searches the graph.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import heapq
+import math
+import time
+import numpy as np
+from Python.logger import Logger
+from Python.Pathfinding.collisionChecker import CollisionChecker
+
+
+class VisibilityGraph:
+    """
+    A* on a visibility graph over the wall ends. Has the same path output as the RRT-planners: planning returns the
+    path from goal to start, and runHeadless returns the path with a dict of statistics. Use setQuery to plan
+    between new points and keep the graph of the walls.
+    """
+
+    # Segments given to the collision checker at a time when the graph is built, bounds the memory the checkers use
+    batchSize = 512
+
+    def __init__(self, start, goal, rand_area_x, rand_area_y, lineList, edge_dist, inflation=1.2,
+                 collision_engine="vectorized", clearance_map=None):
+        """
+
+        :param start: Start point coordinates
+        :param goal: Goal point coordinates
+        :param rand_area_x: Area in x-plane the path can go through
+        :param rand_area_y: Area in y-plane the path can go through
+        :param lineList: list of lines for obstacle-lines
+        :param edge_dist: distance to keep from the obstacles
+        :param inflation: how far outside the ends of the walls the nodes are placed, as a factor of edge_dist
+        :param collision_engine: "vectorized" to use the numpy CollisionChecker, "clearance" to look up distances in
+            clearance_map
+        :param clearance_map: ClearanceMap of the maze, needed for the "clearance" collision engine
+        """
+        self.start = [start[0], start[1]]
+        self.end = [goal[0], goal[1]]
+        self.min_x, self.max_x = rand_area_x
+        self.min_y, self.max_y = rand_area_y
+        self.lineList = lineList
+        self.edge_dist = edge_dist
+        self.inflation = inflation
+        self.collision_engine = collision_engine
+        self.clearance_map = clearance_map
+        self.collisionChecker = None
+
+        # The graph of the wall ends, kept until the maze or the settings change
+        self.graphKey = None
+        self.graphPoints = np.empty((0, 2))
+        self.graphVisible = np.zeros((0, 0), dtype=bool)
+
+        self.points = np.empty((0, 2))
+        self.parents = np.empty(0, dtype=np.int64)
+        self.iterations = 0
+        self.collisionChecks = 0
+        # Why the last planning stopped: "found", "no_path" when the whole graph was searched, or "deadline"
+        self.status = None
+
+    def setQuery(self, start, goal, lineList=None, clearance_map=None):
+        """
+        Sets new points to plan between. The graph of the walls is kept if the maze is the same.
+
+        :param start: Start point coordinates
+        :param goal: Goal point coordinates
+        :param lineList: list of lines for obstacle-lines, None to keep the current
+        :param clearance_map: ClearanceMap of the maze, None to keep the current
+        :return: None
+        """
+        self.start = [start[0], start[1]]
+        self.end = [goal[0], goal[1]]
+        if lineList is not None:
+            self.lineList = lineList
+        if clearance_map is not None:
+            self.clearance_map = clearance_map
+
+    def prepareCollisionChecker(self):
+        """
+        Converts the current lineList for the collision engine.
+
+        :return: None
+        """
+        if self.collision_engine == "vectorized":
+            self.collisionChecker = CollisionChecker(self.lineList, self.edge_dist)
+        elif self.collision_engine == "clearance":
+            if self.clearance_map is None:
+                raise ValueError("The clearance collision engine needs a clearance_map")
+            self.collisionChecker = self.clearance_map.checker(self.edge_dist)
+        else:
+            raise ValueError(f"Unknown collision engine: {self.collision_engine}")
+
+    def wallEndPoints(self):
+        """
+        Places points just outside both ends of every wall, diagonally out from the end on each side of the wall.
+        Points close to each other are merged, and points outside the area or too close to a wall are removed.
+
+        :return: array of shape (n, 2) with the points
+        """
+        if self.lineList is None or len(self.lineList) == 0:
+            return np.empty((0, 2))
+
+        walls = np.asarray(self.lineList, dtype=np.float64).reshape(-1, 4)
+        r = self.edge_dist * self.inflation
+        if self.collision_engine == "clearance":
+            # The clearance map underestimates the distance, the points have to be that much further out
+            r += self.clearance_map.margin + self.clearance_map.scale / 2
+        candidates = []
+        for x1, y1, x2, y2 in walls:
+            length = math.hypot(x2 - x1, y2 - y1)
+            for (px, py), (qx, qy) in (((x1, y1), (x2, y2)), ((x2, y2), (x1, y1))):
+                if length == 0:
+                    directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+                else:
+                    # Along the wall away from it, and the normal of the wall
+                    dx, dy = (px - qx) / length, (py - qy) / length
+                    directions = [(dx - dy, dy + dx), (dx + dy, dy - dx)]
+                for ux, uy in directions:
+                    candidates.append((px + r * ux, py + r * uy))
+
+        # Hough lines often share ends, merge the points that end up on top of each other
+        merged = {}
+        for x, y in candidates:
+            merged.setdefault((int(x // (r / 2)), int(y // (r / 2))), (x, y))
+        points = np.array(list(merged.values()))
+
+        inside = (points[:, 0] >= self.min_x) & (points[:, 0] <= self.max_x) & \
+                 (points[:, 1] >= self.min_y) & (points[:, 1] <= self.max_y)
+        points = points[inside]
+        free = self.collisionChecker.checkSegments(np.hstack((points, points)))
+        return points[free]
+
+    def currentGraphKey(self):
+        """
+        Gets what the graph of the walls depends on, to know when it has to be built again.
+
+        :return: tuple that compares equal for the same maze and settings
+        """
+        walls = None
+        if self.lineList is not None:
+            walls = np.asarray(self.lineList, dtype=np.float64).tobytes()
+        return (walls, self.edge_dist, self.inflation, self.collision_engine, self.clearance_map,
+                self.min_x, self.max_x, self.min_y, self.max_y)
+
+    def checkBatch(self, segments, deadline=None):
+        """
+        Checks segments for collision in batches of batchSize. The segments are sorted by length first, the clearance
+        engine samples every segment in a batch as many times as the longest one needs.
+
+        :param segments: array of shape (n, 4) with x1, y1, x2, y2 for each segment
+        :param deadline: time.monotonic() to give up at, None to check all the segments
+        :return: boolean array, True if no collision, None if the deadline was reached
+        """
+        order = np.argsort(np.hypot(segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1]))
+        free = np.ones(len(segments), dtype=bool)
+        for i in range(0, len(segments), self.batchSize):
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            batch = order[i:i + self.batchSize]
+            free[batch] = self.collisionChecker.checkSegments(segments[batch])
+        return free
+
+    def buildGraph(self, deadline=None):
+        """
+        Finds the wall end points and which of them can see each other, unless it is already done for this maze.
+
+        :param deadline: time.monotonic() to give up at, None to build the whole graph
+        :return: number of segments checked for collision, None if the deadline was reached
+        """
+        key = self.currentGraphKey()
+        if key == self.graphKey:
+            return 0
+        self.graphKey = None
+        self.prepareCollisionChecker()
+        self.graphPoints = self.wallEndPoints()
+        m = len(self.graphPoints)
+        first, second = np.triu_indices(m, 1)
+        free = self.checkBatch(np.hstack((self.graphPoints[first], self.graphPoints[second])), deadline)
+        if free is None:
+            return None
+        self.graphVisible = np.zeros((m, m), dtype=bool)
+        self.graphVisible[first[free], second[free]] = True
+        self.graphVisible |= self.graphVisible.T
+        self.graphKey = key
+        return m + len(first)
+
+    def planning(self, animation=False, deadline=None):
+        """
+        Finds the shortest path through the visibility graph with A*.
+
+        :param animation: not in use, kept so the planners can be called the same way
+        :param deadline: time.monotonic() to give up at, None to search the whole graph
+        :return: the path from goal to start, None if there is no path
+        """
+        self.iterations = 0
+        self.collisionChecks = self.buildGraph(deadline)
+        if self.collisionChecks is None:
+            self.collisionChecks = 0
+            self.status = "deadline"
+            return None
+        # The start is node 0 and the goal is node 1, the edges to them are the only ones checked for every planning
+        ends = np.array([self.start, self.end], dtype=np.float64)
+        self.points = np.vstack((ends, self.graphPoints))
+        n = len(self.points)
+        m = len(self.graphPoints)
+        segments = np.vstack((np.hstack((np.repeat(ends, m, axis=0), np.tile(self.graphPoints, (2, 1)))),
+                              np.hstack((ends[:1], ends[1:]))))
+        free = self.checkBatch(segments)
+        self.collisionChecks += len(segments)
+        visible = np.zeros((n, n), dtype=bool)
+        visible[2:, 2:] = self.graphVisible
+        visible[0, 2:] = free[:m]
+        visible[1, 2:] = free[m:2 * m]
+        visible[0, 1] = visible[1, 0] = free[-1]
+        visible[2:, 0] = visible[0, 2:]
+        visible[2:, 1] = visible[1, 2:]
+
+        self.parents = np.full(n, -1, dtype=np.int64)
+        costs = np.full(n, np.inf)
+        closed = np.zeros(n, dtype=bool)
+        heuristic = np.hypot(self.points[:, 0] - self.end[0], self.points[:, 1] - self.end[1])
+
+        costs[0] = 0.0
+        queue = [(heuristic[0], 0)]
+        while queue:
+            if deadline is not None and time.monotonic() >= deadline:
+                self.status = "deadline"
+                return None
+            _, current = heapq.heappop(queue)
+            if closed[current]:
+                continue
+            closed[current] = True
+            self.iterations += 1
+            if current == 1:
+                self.status = "found"
+                return self.generateFinalCourse(1)
+
+            others = np.flatnonzero(visible[current] & ~closed)
+            dist = np.hypot(self.points[others, 0] - self.points[current, 0],
+                            self.points[others, 1] - self.points[current, 1])
+            better = costs[current] + dist < costs[others]
+            for node, d in zip(others[better], dist[better]):
+                costs[node] = costs[current] + d
+                self.parents[node] = current
+                heapq.heappush(queue, (costs[node] + heuristic[node], node))
+
+        self.status = "no_path"
+        return None
+
+    def generateFinalCourse(self, goal_ind):
+        """
+        Follows the parents from the goal back to the start.
+
+        :param goal_ind: index of the goal node
+        :return: the path from goal to start
+        """
+        path = []
+        node = goal_ind
+        while node != -1:
+            path.append([float(self.points[node, 0]), float(self.points[node, 1])])
+            node = self.parents[node]
+        return path
+
+    def getTreeEdges(self):
+        """
+        Gets the edges of the search tree A* built, from parent to child.
+
+        :return: numpy array of shape (n, 4) with x1, y1, x2, y2 for every edge
+        """
+        children = np.flatnonzero(self.parents != -1)
+        return np.hstack((self.points[self.parents[children]], self.points[children]))
+
+    def treeStats(self, path, planningTime):
+        """
+        Collects statistics about the last planning run.
+
+        :param path: the path the planning returned
+        :param planningTime: how long the planning took in seconds
+        :return: dict with iterations (nodes expanded by A*), nodes, collision_checks, path_length (None if no path),
+            planning_time and status
+        """
+        pathLength = None
+        if path is not None:
+            pathLength = sum(math.hypot(path[i + 1][0] - path[i][0], path[i + 1][1] - path[i][1])
+                             for i in range(len(path) - 1))
+        return {"iterations": self.iterations,
+                "nodes": len(self.points),
+                "collision_checks": self.collisionChecks,
+                "path_length": pathLength,
+                "planning_time": planningTime,
+                "status": self.status}
+
+    def runHeadless(self, finishLoops=False, deadline=None):
+        """
+        Runs the planner without drawing anything, same as RRTStar.runHeadless.
+
+        :param finishLoops: not in use, A* always returns the shortest path in the graph
+        :param deadline: time.monotonic() to give up at, None to search the whole graph
+        :return: the path (None if no path was found) and a dict of statistics
+        """
+        Logger.logg("Running visibility graph A*", Logger.info)
+        startTime = time.time()
+        path = self.planning(deadline=deadline)
+        stats = self.treeStats(path, time.time() - startTime)
+
+        if path is None:
+            Logger.logg("Visibility graph cannot find path", Logger.info)
+        return path, stats
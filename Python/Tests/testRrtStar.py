@@ -0,0 +1,43 @@
+"""
+Tests of the RRT* planner on the recorded mazes in Benchmarks/mazes.
+
+Run from the Python folder with: python -m unittest discover -s Tests -t ..
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import contextlib
+import io
+import random
+import unittest
+
+from Python.Benchmarks.plannerSuite import loadMazes, edgeDist
+from Python.Pathfinding.rrt_star import RRTStar
+
+
+class TestPlanningAnytime(unittest.TestCase):
+
+    def testPathsGetShorter(self):
+        """
+        Every path planningAnytime yields is shorter than the one before
+        """
+        yielded = 0
+        for maze in loadMazes():
+            for goal in maze["points"][1:]:
+                for seed in range(2):
+                    for informed in (False, True):
+                        planner = RRTStar(start=maze["points"][0], goal=goal, lineList=maze["lines"],
+                                          edge_dist=edgeDist, rand_area_x=maze["area_x"], rand_area_y=maze["area_y"],
+                                          expand_dis=100.0, path_resolution=10.0, max_iter=400,
+                                          goal_sample_rate=20, connect_circle_dist=700, informed=informed,
+                                          rng=random.Random(seed))
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            lengths = [planner.pathLength(path) for path in planner.planningAnytime()]
+                        for shorter, longer in zip(lengths[1:], lengths):
+                            self.assertLess(shorter, longer)
+                        yielded += len(lengths)
+        self.assertGreater(yielded, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,14 +12,22 @@ import cv2
 
 from Python.broker import Broker as b
 from Python.GUI import CustomEvent
-from Python.ImageProcessing.draw import drawLines, drawSeveralLines, drawCollisionSectors
+from Python.ImageProcessing.draw import drawLines, drawSeveralLines, drawCollisionSectors, drawTree
 from Python.ImageProcessing.camera import Camera
 from Python.ImageProcessing.findSnake import FindSnake
+from Python.ImageProcessing.snakeTracker import SnakeTracker
 from Python.ImageProcessing.findTarget import FindTarget
+from Python.ImageProcessing.frameContext import FrameContext
 from Python.ImageProcessing.mazeRecognizer import mazeRecognizer
 from Python.Movement.snake import Snake
 from Python.Movement.snakeMethods import SnakeCollision
 from Python.Pathfinding.rrt_star import RRTStar, multiRRTStar
+from Python.Pathfinding.rrt_connect import RRTConnect
+from Python.Pathfinding.visibilityGraph import VisibilityGraph
+from Python.Pathfinding.clearanceMap import ClearanceMap
+from Python.Pathfinding.pathSmoothing import optimizePath
+from Python.Pathfinding.pathCache import PathCache
+from Python.Pathfinding.progress import ProgressReporter
 from Python.logger import Logger
 from Python.ImageProcessing.deadEndDetector import DeadEndDetector
 from Python.Movement.goToTarget import GoToTarget
@@ -42,19 +50,39 @@ class Controller(threading.Thread):
         self.maze = mazeRecognizer()
         self.lines = None
         self.lineImageArray = None
+        self.clearanceMap = None
 
         self.deadEnds = DeadEndDetector()
         self.listOfDeadEnds = None
         ###################################
 
         # RRT* Variabels ##################
+        # Planner for single-target: "rrtStar", "rrtConnect" or "visibility"
+        self.pathPlanner = "rrtStar"
         self.rrtStar = None
+        self.pathCache = PathCache()
+        # Seconds the planners can use before "Find Path" gives up
+        self.planningTimeout = 5.0
+        # Seconds to wait before replanning again after a failed replan, doubled for every failure in a row
+        self.replanBackoff = 2.0
+        self.maxReplanBackoff = 30.0
+        self.replanFailures = 0
+        self.nextReplanTime = 0.0
+        # Largest turn at a waypoint after smoothing, below the 45 deg big dead band of GoToTarget so the snake
+        # steers through the corners instead of stopping to turn on the spot
+        self.maxTurnAngle = 30
+        # Distance between the waypoints on a rounded corner
+        self.turnSpacing = 40
+        self.plannerProgress = ProgressReporter(callback=self.notifyProgress, maxRate=1.0)
         self.multiRrtStar = multiRRTStar(rand_area_x=[300, 1700], rand_area_y=[0, 1200],
                                          lineList=None, expand_dis=50.0, path_resolution=25.0, max_iter=2000,
                                          goal_sample_rate=10,
-                                         edge_dist=30, connect_circle_dist=800, start_point=None, listOfDeadEnds=None)
+                                         edge_dist=30, connect_circle_dist=800, start_point=None, listOfDeadEnds=None,
+                                         collision_engine="clearance", order="tsp", progress=self.plannerProgress,
+                                         time_budget=60.0, workers=None)
         self.rrtPathImage = None
         self.findSnake = FindSnake()
+        self.snakeTracker = SnakeTracker(self.findSnake)
         self.finTarget = FindTarget()
         self.finalPath = None
         ###################################
@@ -97,6 +125,15 @@ class Controller(threading.Thread):
         updateEvent.setArgument(arg)
         self.guiEventhandler(updateEvent)
 
+    def notifyProgress(self, event):
+        """
+        Shows the progress of the path planners in the GUI log.
+
+        :param event: progress event from ProgressReporter
+        :return: Nothing
+        """
+        self.notifyGui("UpdateTextEvent", ProgressReporter.describe(event))
+
     def prepMazeSingle(self):
         """
         Prepares maze by taking picture and running it through maze recognizer.
@@ -106,7 +143,9 @@ class Controller(threading.Thread):
         """
         self.notifyGui("UpdateTextEvent", "Preparing Maze")
         self.lines, self.lineImageArray = self.maze.findMaze()
+        self.clearanceMap = ClearanceMap(self.lines)
         self.snakeCollision.mazeLines = self.lines
+        self.snakeCollision.clearanceMap = self.clearanceMap
 
         self.notifyGui("UpdateImageEventR", self.lineImageArray)
         self.notifyGui("UpdateTextEvent", "Maze Ready")
@@ -123,32 +162,47 @@ class Controller(threading.Thread):
         temp = None
         startX = None
         startY = None
+        # The snake and the target are found in the same frame
+        picture = FrameContext(self.cam.takePicture())
         try:
-            cords, temp = self.findSnake.locateSnake(self.cam.takePicture())
+            cords, temp = self.findSnake.locateSnake(picture)
             startX = cords[0][0]
             startY = cords[0][1]
         except TypeError:
             self.notifyGui("UpdateTextEvent", "Could not find snake")
             return
         try:
-            d, frame, radius, center = self.finTarget.getTarget(self.cam.takePicture())
+            d, frame, radius, center = self.finTarget.getTarget(picture)
             goalX = center[0]
             goalY = center[1]
         except TypeError:
             self.notifyGui("UpdateTextEvent", "Could not find target")
             return
-        self.rrtStar = RRTStar(start=[startX, startY], goal=[goalX, goalY], rand_area_x=[250, 1500],
-                               rand_area_y=[0, 1100],
-                               lineList=self.lines,
-                               expand_dis=100.0, path_resolution=10.0, max_iter=2000, goal_sample_rate=20,
-                               connect_circle_dist=700,
-                               edge_dist=self.collisionDistance)
-        self.rrtStar.lineList = self.lines
-        self.rrtPathImage, self.finalPath = self.rrtStar.run(finishLoops=False)
+        checker = self.clearanceMap.checker(self.collisionDistance)
+        self.finalPath = self.pathCache.get(self.lines, [startX, startY], [goalX, goalY], checker)
+        if self.finalPath is not None:
+            Logger.logg("Using cached path", Logger.info)
+            # The tree is from another search, but the graph of the visibility planner can be used for any search
+            if not isinstance(self.rrtStar, VisibilityGraph):
+                self.rrtStar = None
+            self.rrtPathImage = self.lineImageArray.copy()
+        else:
+            self.rrtStar = self.createPlanner([startX, startY], [goalX, goalY])
+            self.finalPath, stats = self.rrtStar.runHeadless(finishLoops=False,
+                                                             deadline=time.monotonic() + self.planningTimeout)
+            if stats["status"] == "deadline":
+                Logger.logg(f"Path planning stopped after {self.planningTimeout} sec", Logger.info)
+            self.pathCache.put(self.lines, [startX, startY], [goalX, goalY], self.finalPath)
+            self.rrtPathImage = drawTree(self.lineImageArray.copy(), self.rrtStar.getTreeEdges(), (255, 255, 0))
         if self.finalPath is not None:
+            self.finalPath = optimizePath(self.finalPath, checker, self.maxTurnAngle, self.turnSpacing)
+            self.rrtPathImage = drawLines(self.rrtPathImage, self.finalPath, (255, 0, 0))
             self.finalPath = self.finalPath[::-1]
             self.notifyGui("UpdateTextEvent", "Path found!")
             self.goToTarget.path = self.finalPath
+            self.goToTarget.replan = False
+            self.replanFailures = 0
+            self.nextReplanTime = 0.0
         else:
             self.notifyGui("UpdateTextEvent", "Could not find path")
 
@@ -159,6 +213,76 @@ class Controller(threading.Thread):
 
         garbageCollector.collect()
 
+    def replanSingle(self, snakePoint):
+        """
+        Finds a new path from the snake to the goal when it has been pushed away from the path. Reuses the RRT*
+        tree if there is one, and plans from scratch in the time left if that fails or there is no tree. After a
+        failed replan no new replan is tried until the backoff time has passed, so a snake that stays off the path
+        does not block the controller every cycle.
+
+        :param snakePoint: (x,y) of the front of the snake
+        :return: None
+        """
+        self.goToTarget.replan = False
+        if time.monotonic() < self.nextReplanTime:
+            return
+        start = [snakePoint[0], snakePoint[1]]
+        goal = self.goToTarget.path[-1]
+        deadline = time.monotonic() + self.planningTimeout
+        path = None
+        if isinstance(self.rrtStar, RRTStar):
+            path = self.rrtStar.replan(start, deadline=deadline)
+        if path is None and time.monotonic() < deadline:
+            self.rrtStar = self.createPlanner(start, goal)
+            path, _ = self.rrtStar.runHeadless(finishLoops=False, deadline=deadline)
+
+        if path is None:
+            self.replanFailures += 1
+            wait = min(self.replanBackoff * 2 ** (self.replanFailures - 1), self.maxReplanBackoff)
+            self.nextReplanTime = time.monotonic() + wait
+            self.notifyGui("UpdateTextEvent", f"Could not find new path, keeping the old one. "
+                                              f"Trying again in {wait:.0f} sec")
+            return
+        self.replanFailures = 0
+        path = optimizePath(path, self.clearanceMap.checker(self.collisionDistance), self.maxTurnAngle,
+                            self.turnSpacing)
+        self.finalPath = path[::-1]
+        self.goToTarget.path = self.finalPath
+        self.goToTarget.i = 0
+        self.notifyGui("UpdateTextEvent", "New path found")
+
+    def createPlanner(self, start, goal):
+        """
+        Creates the single-target planner selected in pathPlanner
+
+        :param start: start point coordinates
+        :param goal: goal point coordinates
+        :return: planner with runHeadless, getTreeEdges and collisionChecker
+        """
+        if self.pathPlanner == "rrtStar":
+            return RRTStar(start=start, goal=goal, rand_area_x=[250, 1500], rand_area_y=[0, 1100],
+                           lineList=self.lines,
+                           expand_dis=100.0, path_resolution=10.0, max_iter=2000, goal_sample_rate=20,
+                           connect_circle_dist=700,
+                           edge_dist=self.collisionDistance,
+                           collision_engine="clearance", clearance_map=self.clearanceMap,
+                           progress=self.plannerProgress)
+        elif self.pathPlanner == "rrtConnect":
+            return RRTConnect(start=start, goal=goal, rand_area_x=[250, 1500], rand_area_y=[0, 1100],
+                              lineList=self.lines, edge_dist=self.collisionDistance, expand_dis=100.0,
+                              max_iter=2000, goal_sample_rate=20,
+                              collision_engine="clearance", clearance_map=self.clearanceMap,
+                              progress=self.plannerProgress)
+        elif self.pathPlanner == "visibility":
+            if isinstance(self.rrtStar, VisibilityGraph):
+                # Keeps the graph of the walls, it is only built again if the maze has changed
+                self.rrtStar.setQuery(start, goal, self.lines, self.clearanceMap)
+                return self.rrtStar
+            return VisibilityGraph(start=start, goal=goal, rand_area_x=[250, 1500], rand_area_y=[0, 1100],
+                                   lineList=self.lines, edge_dist=self.collisionDistance,
+                                   collision_engine="clearance", clearance_map=self.clearanceMap)
+        raise ValueError(f"Unknown path planner: {self.pathPlanner}")
+
     def prepMazeMulti(self):
         """
         Prepares the maze for multi-target. Finds dead ends and saves these in a list. Then gives the multiRRT the lines
@@ -168,11 +292,17 @@ class Controller(threading.Thread):
         :return: None
         """
         self.notifyGui("UpdateTextEvent", "Preparing Maze")
-        self.lines, self.lineImageArray = self.maze.findMaze()
+        # The walls and the dead ends are found in the same frame, and share its grayscale version. The frame comes
+        # from the maze recognizer, so testing mode uses its test picture for both
+        frame = FrameContext(self.maze.takePicture())
+        self.lines, self.lineImageArray = self.maze.findMaze(frame)
+        self.clearanceMap = ClearanceMap(self.lines)
         self.snakeCollision.mazeLines = self.lines
+        self.snakeCollision.clearanceMap = self.clearanceMap
 
-        self.listOfDeadEnds, picDeadEnd = self.deadEnds.getDeadEnds(self.cam.takePicture())
+        self.listOfDeadEnds, picDeadEnd = self.deadEnds.getDeadEnds(frame)
         self.multiRrtStar.lineList = self.lines
+        self.multiRrtStar.clearance_map = self.clearanceMap
         self.multiRrtStar.listOfDeadEnds = self.listOfDeadEnds
 
         self.notifyGui("UpdateImageEventR", self.lineImageArray)
@@ -206,10 +336,16 @@ class Controller(threading.Thread):
 
 
         if self.finalPath is not None:
+            checker = self.clearanceMap.checker(self.multiRrtStar.edge_dist)
+            self.finalPath = [optimizePath(path, checker, self.maxTurnAngle, self.turnSpacing)
+                              for path in self.finalPath]
             self.notifyGui("UpdateTextEvent", "Path found!")
             self.seekAndDestroy = SeekAndDestroy(self.finalPath, self.snake, self.snakeCollision, 10, 45, 20, 80,
                                                  self.eventData)
             self.seekAndDestroy.path = self.finalPath[0]
+        elif self.multiRrtStar.status == "deadline":
+            self.notifyGui("UpdateTextEvent", f"Could not find path in {self.multiRrtStar.time_budget} sec")
+            return
         else:
             self.notifyGui("UpdateTextEvent", "Could not find path")
             return
@@ -243,7 +379,7 @@ class Controller(threading.Thread):
         """
         colorPic = self.cam.takePicture()
 
-        snakeCoordinates, maskPic = self.findSnake.locateSnakeAverage(1, 1, picture=colorPic)
+        snakeCoordinates, maskPic = self.snakeTracker.locate(colorPic)
         if snakeCoordinates:
             # Movement
             # returns false if the snake is not ready to receive a command
@@ -261,6 +397,8 @@ class Controller(threading.Thread):
 
                 # Run go to target to make the movements
                 self.goToTarget.run(snakeCoordinates, self.collisionDistance)
+                if self.goToTarget.replan and not self.goToTarget.goalReached:
+                    self.replanSingle(snakeCoordinates[1])
 
                 # Set new timer
                 self.lastCmdSent = time.time()
@@ -279,7 +417,7 @@ class Controller(threading.Thread):
         """
         colorPic = self.cam.takePicture()
 
-        snakeCoordinates, maskPic = self.findSnake.locateSnakeAverage(1, 1, picture=colorPic)
+        snakeCoordinates, maskPic = self.snakeTracker.locate(colorPic)
         if snakeCoordinates:
             # Movement
             # returns false if the snake is not ready to receive a command
@@ -468,4 +606,5 @@ class Controller(threading.Thread):
             garbageCollector.collect()
 
         Camera.releaseCam()
+        self.multiRrtStar.close()
         Logger.logg("Controller thread shutting down", Logger.info)
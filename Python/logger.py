@@ -15,6 +15,9 @@ class Logger:
     warning = 3
     error = 4
 
+    # Processes that must not write to the log file, like the planning processes of multiRRTStar, turn this off
+    enabled = True
+
     path = os.getcwd().split("\\")
     if path[len(path) - 1] == "Python":
         path = "..\\"
@@ -76,6 +79,8 @@ class Logger:
         :param type: What kind of info it is
         :return: None
         """
+        if not Logger.enabled:
+            return
         timeStamp = Logger.timeStamp()
         messageType = Logger.getType(type)
         Logger.logFile.write(timeStamp + messageType + message + "\n")
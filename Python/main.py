@@ -4,20 +4,26 @@ Main run file of the whole program
 author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
 """
 
-from Python.GUI import GUI
-from Python.controller import Controller
 from Python.logger import Logger
+from Python.startup import warmUp
 
-try:
-    gui = GUI()
-    eventData = gui.getEventInfo()
+if __name__ == "__main__":
+    # The planner process pool imports this file again in every worker on Windows, so the program is only started,
+    # and the GUI only imported, when this is the file being run
+    warmUp()
+    from Python.GUI import GUI
+    from Python.controller import Controller
 
-    controller = Controller(eventData)
-    controller.start()
+    try:
+        gui = GUI()
+        eventData = gui.getEventInfo()
 
-    gui.run()
+        controller = Controller(eventData)
+        controller.start()
 
-    controller.join()
-finally:
-    Logger.stopLogging()
-    print("File saved")
+        gui.run()
+
+        controller.join()
+    finally:
+        Logger.stopLogging()
+        print("File saved")
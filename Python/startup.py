@@ -0,0 +1,53 @@
+"""
+Helpers for getting the GUI up fast. Modules that are not needed to show the GUI are imported in a background
+thread, so they are ready by the time the controller first uses them.
+
+author: Håkon Bjerkgaard Waldum, Ruben Svedal Jørundland, Marcus Olai Grindvik
+"""
+
+import importlib
+import threading
+import time
+
+from Python.logger import Logger
+
+# Heavy modules that are imported where they are used instead of at the top of the file
+lazyModules = ["shapely.geometry"]
+
+
+def importModules(modules):
+    """
+    Imports a list of modules and measures how long each import took
+
+    :param modules: list of module names
+    :return: dict with the import time in seconds for every module, None if the module could not be imported
+    """
+    importTimes = {}
+    for module in modules:
+        startTime = time.perf_counter()
+        try:
+            importlib.import_module(module)
+            importTimes[module] = time.perf_counter() - startTime
+        except ImportError:
+            Logger.logg(f"Warm-up could not import {module}", Logger.warning)
+            importTimes[module] = None
+    return importTimes
+
+
+def warmUp(modules=None):
+    """
+    Imports the lazy modules in a background thread
+
+    :param modules: list of module names, lazyModules if None
+    :return: the started thread
+    """
+    if modules is None:
+        modules = lazyModules
+
+    def run():
+        importTimes = importModules(modules)
+        Logger.logg(f"Warm-up imports done: {importTimes}", Logger.debug)
+
+    thread = threading.Thread(target=run, name="warmUp", daemon=True)
+    thread.start()
+    return thread